@@ -0,0 +1,286 @@
+"""
+Offline load and latency benchmark for the face (model/) and text (textModel/)
+services. Both are started locally against an in-memory Mongo with a synthetic
+catalog, driven with synthetic videos and questionnaire answers at several
+concurrency levels, and the results are written as JSON:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json   # exits 1 on a regression
+
+Models are the real ones, so both services need their weights available locally
+(see TEXT_MODEL_PATH for an offline text model).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(ROOT, "textModel"))
+
+from synthetic import EMOTIONS, make_face_video, make_responses  # noqa: E402
+
+# p95 may grow and throughput may drop by this fraction before it counts as a regression
+LATENCY_TOLERANCE = 0.25
+# Absolute drop in accuracy allowed against the baseline
+ACCURACY_TOLERANCE = 0.02
+# Absolute rise in the share of 4xx responses allowed against the baseline
+CLIENT_ERROR_TOLERANCE = 0.05
+STARTUP_TIMEOUT_SECONDS = 600
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def start_service(service, port, env):
+    command = [sys.executable, os.path.join(HERE, "serve.py"), service, "--port", str(port)]
+    return subprocess.Popen(command, env={**os.environ, **env},
+                            stdout=subprocess.DEVNULL if not os.getenv("BENCH_VERBOSE") else None,
+                            stderr=subprocess.STDOUT if not os.getenv("BENCH_VERBOSE") else None)
+
+
+def wait_ready(url, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Service behind {url} exited with code {process.returncode}")
+        try:
+            if requests.get(url, timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"{url} not ready after {STARTUP_TIMEOUT_SECONDS}s")
+
+
+def run_load(send, total, concurrency):
+    """Calls send(i) `total` times from `concurrency` threads; returns latency/throughput stats."""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            status = send(i)
+        except requests.RequestException:
+            status = None
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(total)))
+    elapsed = time.perf_counter() - started
+
+    # Only 2xx responses count: a 4xx (e.g. 422 for no face) takes a much shorter path
+    latencies = sorted(latency * 1000 for latency, status in results if status is not None and 200 <= status < 300)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    client_errors = sum(1 for _, status in results if status is not None and 400 <= status < 500)
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "client_error_rate": client_errors / total if total else None,
+        "statuses": statuses,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "throughput_rps": len(latencies) / elapsed if elapsed else None,
+    }
+
+
+def face_endpoints(base, videos):
+    def analyze(i):
+        with open(videos[i % len(videos)], "rb") as video:
+            return requests.post(f"{base}/analyze", files={"video": ("clip.mp4", video, "video/mp4")},
+                                 timeout=120).status_code
+
+    return {
+        "face /analyze": analyze,
+        "face /api/songs/<emotion>":
+            lambda i: requests.get(f"{base}/api/songs/{EMOTIONS[i % len(EMOTIONS)]}", timeout=30).status_code,
+        "face /api/songs?limit=50":
+            lambda i: requests.get(f"{base}/api/songs?limit=50", timeout=30).status_code,
+    }
+
+
+def check_face_detections(base, videos):
+    """
+    Posts every synthetic video once and returns how many came back with a face.
+    Clips without one are answered 422 on a short path that would skew the numbers.
+    """
+    detected = 0
+    for path in videos:
+        with open(path, "rb") as video:
+            response = requests.post(f"{base}/analyze", files={"video": ("clip.mp4", video, "video/mp4")}, timeout=120)
+        if response.status_code == 200:
+            detected += 1
+    return detected
+
+
+def text_endpoints(base, submissions):
+    return {
+        "text /predict": lambda i: requests.post(f"{base}/predict", json={"responses": submissions[i % len(submissions)]},
+                                                 timeout=120).status_code,
+        "text /songs/<emotion>":
+            lambda i: requests.get(f"{base}/songs/{EMOTIONS[i % len(EMOTIONS)]}", timeout=30).status_code,
+    }
+
+
+def text_accuracy(base):
+    """Share of the curated questionnaire cases whose primary emotion is an expected one."""
+    from test_emotions import TEST_CASES
+    correct = 0
+    for case in TEST_CASES:
+        response = requests.post(f"{base}/predict", json={"responses": case["responses"]}, timeout=120)
+        if response.status_code == 200 and response.json().get("primary_emotion", "").lower() in case["expected_emotion"]:
+            correct += 1
+    return correct / len(TEST_CASES)
+
+
+def face_accuracy(base, clips_dir):
+    """Accuracy on labelled clips named <emotion>_<anything>.<ext>, or None without clips."""
+    if not clips_dir:
+        return None
+    clips = sorted(name for name in os.listdir(clips_dir) if "_" in name)
+    correct = 0
+    for name in clips:
+        with open(os.path.join(clips_dir, name), "rb") as video:
+            response = requests.post(f"{base}/analyze", files={"video": (name, video)}, timeout=120)
+        if response.status_code == 200 and response.json().get("emotion") == name.split("_")[0]:
+            correct += 1
+    return correct / len(clips) if clips else None
+
+
+def compare(results, baseline):
+    """Returns human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for endpoint, levels in results["endpoints"].items():
+        for level, stats in levels.items():
+            before = baseline.get("endpoints", {}).get(endpoint, {}).get(level)
+            if not before:
+                continue
+            if stats["p95_ms"] and before.get("p95_ms") and stats["p95_ms"] > before["p95_ms"] * (1 + LATENCY_TOLERANCE):
+                regressions.append(f"{endpoint} @ {level}: p95 {before['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms")
+            if (stats["throughput_rps"] is not None and before.get("throughput_rps")
+                    and stats["throughput_rps"] < before["throughput_rps"] * (1 - LATENCY_TOLERANCE)):
+                regressions.append(f"{endpoint} @ {level}: throughput "
+                                   f"{before['throughput_rps']:.1f} -> {stats['throughput_rps']:.1f} req/s")
+            if stats["client_error_rate"] > before.get("client_error_rate", 0) + CLIENT_ERROR_TOLERANCE:
+                regressions.append(f"{endpoint} @ {level}: 4xx share "
+                                   f"{before.get('client_error_rate', 0):.0%} -> {stats['client_error_rate']:.0%}")
+    for name, value in results["accuracy"].items():
+        before = baseline.get("accuracy", {}).get(name)
+        if value is not None and before is not None and value < before - ACCURACY_TOLERANCE:
+            regressions.append(f"{name} accuracy {before:.3f} -> {value:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", default="face,text", help="comma-separated: face, text")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="requests per endpoint and level")
+    parser.add_argument("--videos", type=int, default=16, help="distinct synthetic videos")
+    parser.add_argument("--face-image", help="photo to animate instead of the drawn face")
+    parser.add_argument("--face-clips", help="directory of labelled clips for face accuracy")
+    parser.add_argument("--output", default=os.path.join(HERE, "results.json"))
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--face-port", type=int, default=7861)
+    parser.add_argument("--text-port", type=int, default=5011)
+    args = parser.parse_args()
+
+    services = set(args.services.split(","))
+    levels = [int(level) for level in args.concurrency.split(",")]
+    rng = random.Random(0)
+    processes = []
+    endpoints = {}
+    accuracy = {"text": None, "face": None}
+    workdir = tempfile.mkdtemp(prefix="moodify-bench-")
+
+    try:
+        if "face" in services:
+            # Caching would turn repeated uploads into lookups; measure the pipeline itself
+            processes.append(start_service("face", args.face_port, {"RESULT_CACHE_MB": "0"}))
+        if "text" in services:
+            processes.append(start_service("text", args.text_port, {"PREDICTION_CACHE_ENABLED": "0"}))
+
+        face_base = f"http://127.0.0.1:{args.face_port}"
+        text_base = f"http://127.0.0.1:{args.text_port}"
+        if "face" in services:
+            import cv2
+            face_image = cv2.imread(args.face_image) if args.face_image else None
+            videos = [make_face_video(os.path.join(workdir, f"face_{i}.mp4"), seed=i, face_image=face_image)
+                      for i in range(args.videos)]
+            wait_ready(f"{face_base}/readyz", processes[0])
+            detected = check_face_detections(face_base, videos)
+            if not detected:
+                raise RuntimeError("No face was detected in any synthetic video; /analyze would only measure "
+                                   "the 422 path. Pass --face-image with a real photo.")
+            if detected < len(videos):
+                print(f"WARNING: a face was detected in only {detected}/{len(videos)} synthetic videos; "
+                      f"see client_error_rate for /analyze")
+            endpoints.update(face_endpoints(face_base, videos))
+            accuracy["face"] = face_accuracy(face_base, args.face_clips)
+        if "text" in services:
+            submissions = [make_responses(rng) for _ in range(args.requests)]
+            wait_ready(f"{text_base}/ready", processes[-1])
+            endpoints.update(text_endpoints(text_base, submissions))
+            accuracy["text"] = text_accuracy(text_base)
+
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "requests_per_level": args.requests,
+            },
+            "endpoints": {},
+            "accuracy": accuracy,
+        }
+        print(f"{'endpoint':<28}{'conc':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'4xx':>7}  statuses")
+        for name, send in endpoints.items():
+            send(0)  # warm-up
+            for level in levels:
+                stats = run_load(send, args.requests, level)
+                results["endpoints"].setdefault(name, {})[str(level)] = stats
+                fmt = lambda v: f"{v:9.1f}" if v is not None else f"{'-':>9}"  # noqa: E731
+                print(f"{name:<28}{level:>5}{fmt(stats['p50_ms'])}{fmt(stats['p95_ms'])}{fmt(stats['p99_ms'])}"
+                      f"{fmt(stats['throughput_rps'])}{stats['client_error_rate']:>7.0%}  {stats['statuses']}")
+        print(f"accuracy: {accuracy}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+    with open(args.output, "w") as out:
+        json.dump(results, out, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Runs one of the services against an in-memory MongoDB (mongomock) seeded
+with a synthetic song catalog. Started by run.py, one process per service:
+
+    python benchmarks/serve.py face --port 7861
+    python benchmarks/serve.py text --port 5011
+"""
+import argparse
+import os
+import sys
+
+import mongomock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_songs  # noqa: E402
+
+
+def local_client(songs_per_emotion):
+    client = mongomock.MongoClient()
+    client.moodify_db.songs_by_emotion.insert_many(make_songs(songs_per_emotion))
+    return client
+
+
+def face_app(client):
+    # The model service imports its modules flat and loads files relative to model/
+    os.chdir(os.path.join(ROOT, "model"))
+    sys.path.insert(0, os.getcwd())
+    import flask_pymongo
+
+    class LocalPyMongo:
+        def __init__(self, app):
+            self.db = client.moodify_db
+
+    flask_pymongo.PyMongo = LocalPyMongo
+    from __init__ import app
+    return app
+
+
+def text_app(client):
+    sys.path.insert(0, os.path.join(ROOT, "textModel"))
+    import app as text_service
+    from database import SongDatabase
+    from song_queries import ensure_indexes
+
+    class LocalSongDatabase(SongDatabase):
+        def _connect(self):
+            songs_collection = client[self.db_name]["songs_by_emotion"]
+            ensure_indexes(songs_collection)
+            return client, songs_collection
+
+        def ping(self):
+            return self.connect().count_documents({})
+
+    text_service.song_db = LocalSongDatabase()
+    return text_service.create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("service", choices=["face", "text"])
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--songs-per-emotion", type=int, default=200)
+    args = parser.parse_args()
+
+    client = local_client(args.songs_per_emotion)
+    app = face_app(client) if args.service == "face" else text_app(client)
+    app.run(host="127.0.0.1", port=args.port, threaded=True, use_reloader=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Synthetic inputs for the benchmarks: face videos, questionnaire answers and a song catalog."""
+import random
+
+import cv2
+import numpy as np
+
+EMOTIONS = ["happy", "sad", "angry", "surprise", "neutral"]
+
+SENTENCES = {
+    "happy": [
+        "I had a wonderful day with my friends and laughed a lot.",
+        "Everything went great at work and I feel really proud.",
+        "I'm so excited about the trip we planned for next week.",
+    ],
+    "sad": [
+        "I feel lonely and nothing seems to matter anymore.",
+        "I miss my family and the house feels empty without them.",
+        "Today was heavy and I cried on the way home.",
+    ],
+    "angry": [
+        "I am furious that they cancelled without telling me.",
+        "People keep ignoring what I say and it makes me mad.",
+        "The whole situation is unfair and I'm fed up with it.",
+    ],
+    "surprised": [
+        "I can't believe they threw me a party, I had no idea!",
+        "Out of nowhere I got a call offering me the job.",
+        "Wow, I never expected the results to turn out like that.",
+    ],
+    "neutral": [
+        "I went to the store and then cooked dinner.",
+        "The meeting covered the schedule for next month.",
+        "It was an ordinary day, nothing much happened.",
+    ],
+}
+
+
+def make_responses(rng, emotion=None, answers=3):
+    """A questionnaire submission: `answers` sentences, mostly about one emotion."""
+    emotion = emotion or rng.choice(list(SENTENCES))
+    return [rng.choice(SENTENCES[emotion]) for _ in range(answers)]
+
+
+def _draw_face(frame, cx, cy, scale, smile):
+    skin = (140, 170, 210)
+    axes = (int(60 * scale), int(80 * scale))
+    cv2.ellipse(frame, (cx, cy), axes, 0, 0, 360, skin, -1)
+    for dx in (-22, 22):
+        eye = (cx + int(dx * scale), cy - int(20 * scale))
+        cv2.ellipse(frame, eye, (int(10 * scale), int(6 * scale)), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(frame, eye, int(4 * scale), (40, 30, 20), -1)
+        cv2.line(frame, (eye[0] - int(12 * scale), eye[1] - int(14 * scale)),
+                 (eye[0] + int(12 * scale), eye[1] - int(14 * scale)), (50, 40, 30), max(1, int(3 * scale)))
+    cv2.line(frame, (cx, cy - int(5 * scale)), (cx - int(6 * scale), cy + int(15 * scale)), (110, 130, 170), 2)
+    mouth_axes = (int(22 * scale), max(1, int(abs(smile) * 12 * scale)))
+    start, end = (0, 180) if smile >= 0 else (180, 360)
+    cv2.ellipse(frame, (cx, cy + int(35 * scale)), mouth_axes, 0, start, end, (60, 40, 150), max(1, int(3 * scale)))
+
+
+def make_face_video(path, seed, frames=60, size=(320, 240), fps=30, face_image=None):
+    """
+    Writes a short mp4 of a moving face. A drawn face is used unless
+    `face_image` (a photo, BGR array) is given, which is panned and zoomed
+    instead; real photos are what the SSD detector is tuned for.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    background = rng.integers(30, 90, size=3).tolist()
+    smile = rng.uniform(-1, 1)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(frames):
+        t = i / frames
+        if face_image is not None:
+            zoom = 1.0 + 0.1 * np.sin(2 * np.pi * t + seed)
+            shift = (10 * np.sin(2 * np.pi * t), 6 * np.cos(2 * np.pi * t))
+            matrix = cv2.getRotationMatrix2D((face_image.shape[1] / 2, face_image.shape[0] / 2), 0, zoom)
+            matrix[:, 2] += shift
+            frame = cv2.resize(cv2.warpAffine(face_image, matrix, face_image.shape[1::-1],
+                                              borderMode=cv2.BORDER_REFLECT), size)
+        else:
+            frame = np.full((height, width, 3), background, np.uint8)
+            cx = int(width / 2 + 20 * np.sin(2 * np.pi * t))
+            cy = int(height / 2 + 10 * np.cos(2 * np.pi * t))
+            _draw_face(frame, cx, cy, height / 240, smile)
+        noise = rng.integers(0, 6, size=frame.shape, dtype=np.uint8)
+        writer.write(cv2.add(frame, noise))
+    writer.release()
+    return path
+
+
+def make_songs(per_emotion, seed=0):
+    """Catalog documents shaped like the ones add_song stores."""
+    rng = random.Random(seed)
+    return [
+        {
+            "emotion": emotion,
+            "song_title": f"{emotion.title()} Song {i}",
+            "artist": f"Artist {rng.randint(1, 50)}",
+            "song_uri": f"https://example.invalid/songs/{emotion}/{i}.mp3",
+            "song_image": f"https://example.invalid/song_images/{emotion}/{i}.jpg",
+        }
+        for emotion in EMOTIONS + ["surprised"]
+        for i in range(per_emotion)
+    ]
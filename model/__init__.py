@@ -6,11 +6,14 @@ from flask_pymongo import PyMongo
 from dotenv import load_dotenv
 import cloudinary
 import cloudinary.uploader
+from ingest import SpoolingRequest, MAX_UPLOAD_BYTES
 
 # Load env variables
 load_dotenv()
 
 app = Flask(__name__)
+# Uploads stay in memory until they outgrow UPLOAD_SPILL_MB
+app.request_class = SpoolingRequest
 
 # Enable CORS
 CORS(
@@ -29,6 +32,7 @@ CORS(
 # Config from env
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY")
 app.config["MONGO_URI"] = os.getenv("MONGO_URI")
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
 
 # MongoDB connection
 mongodb_client = PyMongo(app)
@@ -41,3 +45,16 @@ cloudinary.config(
 
 # Attach routes
 import routes
+
+# Load and warm every model before this worker takes traffic
+from workers import start_pool, INFERENCE_WORKERS
+if INFERENCE_WORKERS > 0:
+    # Each inference process loads and warms its own models
+    start_pool()
+elif os.getenv("WARMUP_ON_START", "1") == "1":
+    from warmup import warm_up
+    warm_up()
+else:
+    # Nothing to wait for; the first requests pay for loading the models
+    from warmup import skip_warm_up
+    skip_warm_up()
@@ -0,0 +1,178 @@
+# In-process song catalog: per-emotion song lists built once from Mongo and
+# served pre-serialized until add_song/delete_song invalidate them.
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+# Upper bound on staleness when another web worker (or process) writes to the catalog
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", "60"))
+
+ALL = None  # key of the entry holding every song
+
+# Emotion lookups filter on emotion and page on _id
+SONG_INDEXES = [
+    [("emotion", 1), ("_id", 1)],
+]
+
+
+def ensure_indexes(collection):
+    """Creates the indexes song lookups rely on, warning instead of failing startup."""
+    for keys in SONG_INDEXES:
+        try:
+            collection.create_index(keys)
+        except Exception as e:
+            print(f"Warning: could not create index {keys} on songs; lookups will scan the collection:", e)
+
+
+class CatalogEntry:
+    """One cached song list together with its serialized response and validators."""
+
+    def __init__(self, songs, body, last_modified, ttl):
+        self.songs = songs
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = last_modified
+        self.expires = time.monotonic() + ttl
+
+
+class SongCatalog:
+    """
+    Caches `songs_by_emotion` per emotion (plus the full list) with each
+    response body already JSON-encoded. Entries are rebuilt lazily after
+    invalidate() or once they are older than `ttl`. The Mongo query runs
+    outside the lock, once per key: concurrent misses share its result.
+    """
+
+    def __init__(self, collection, ttl=CATALOG_TTL_SECONDS):
+        self.collection = collection
+        self.ttl = ttl
+        self._entries = {}
+        self._building = {}  # emotion -> Future of the entry being built
+        self._version = 0  # bumped by invalidate(), so a build racing with it is not kept
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, emotion):
+        query = {} if emotion is ALL else {"emotion": emotion}
+        songs = list(self.collection.find(query))
+        for song in songs:
+            song['_id'] = str(song['_id'])
+        payload = songs if emotion is ALL else {"emotion": emotion, "songs": songs}
+        body = json.dumps(payload, separators=(",", ":")).encode()
+
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        entry = CatalogEntry(songs, body, now, self.ttl)
+        previous = self._entries.get(emotion)
+        if previous is not None and previous.etag == entry.etag:
+            # Unchanged content keeps its validators so clients keep getting 304s
+            entry.last_modified = previous.last_modified
+        return entry
+
+    def get(self, emotion=ALL):
+        """Returns the CatalogEntry for `emotion`, or for every song when omitted."""
+        with self._lock:
+            entry = self._entries.get(emotion)
+            if entry is not None and entry.expires > time.monotonic():
+                self.hits += 1
+                return entry
+            self.misses += 1
+            pending = self._building.get(emotion)
+            leader = pending is None
+            if leader:
+                pending = self._building[emotion] = Future()
+                version = self._version
+
+        if not leader:
+            # Another request is already querying this key; share its result or error
+            return pending.result()
+        try:
+            entry = self._build(emotion)
+        except Exception as e:
+            with self._lock:
+                del self._building[emotion]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._building[emotion]
+            if self._version != version:
+                # Invalidated while the query ran: serve it this once, rebuild on the next lookup
+                entry.expires = 0
+            self._entries[emotion] = entry
+        pending.set_result(entry)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def songs(self, emotion):
+        return self.get(emotion).songs
+
+    def invalidate(self, emotion=ALL):
+        """Drops `emotion` (or everything when omitted) and the full list."""
+        with self._lock:
+            self._version += 1
+            if emotion is ALL:
+                for entry in self._entries.values():
+                    entry.expires = 0
+            else:
+                for key in (emotion, ALL):
+                    if key in self._entries:
+                        self._entries[key].expires = 0
+
+
+# Paged listings, for clients that should not pull the whole catalog at once
+SONGS_PAGE_SIZE = int(os.getenv("SONGS_PAGE_SIZE", "50"))
+SONGS_PAGE_MAX = int(os.getenv("SONGS_PAGE_MAX", "200"))
+SONG_FIELDS = ("emotion", "song_title", "artist", "song_uri", "song_image")
+
+
+def parse_projection(fields):
+    """Turns a comma-separated ?fields= value into a Mongo projection, or None for every field."""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SONG_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown song fields: {', '.join(unknown)}")
+    return {name: 1 for name in names}
+
+
+def _page_cursor(collection, emotion, after, limit, projection):
+    query = {} if emotion is ALL else {"emotion": emotion}
+    if after is not None:
+        # Keyset pagination: resume after the last _id of the previous page
+        query["_id"] = {"$gt": after}
+    cursor = collection.find(query, projection).sort("_id", 1)
+    return cursor.limit(limit) if limit else cursor
+
+
+def find_page(collection, emotion, after, limit, projection):
+    """
+    Returns up to `limit` songs with _id greater than `after`, in _id order,
+    and the cursor for the next page (None on the last page).
+    """
+    songs = list(_page_cursor(collection, emotion, after, limit + 1, projection))
+    next_cursor = str(songs[limit - 1]['_id']) if len(songs) > limit else None
+    songs = songs[:limit]
+    for song in songs:
+        song['_id'] = str(song['_id'])
+    return songs, next_cursor
+
+
+def stream_songs(collection, emotion, after, limit, projection):
+    """Yields songs as NDJSON lines straight from the Mongo cursor, one batch in memory at a time."""
+    for song in _page_cursor(collection, emotion, after, limit, projection).batch_size(SONGS_PAGE_SIZE):
+        song['_id'] = str(song['_id'])
+        yield json.dumps(song, separators=(",", ":")) + "\n"
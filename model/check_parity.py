@@ -0,0 +1,112 @@
+import sys
+import time
+import cv2
+import numpy as np
+
+# --- Configuration ---
+# Largest allowed difference (in percentage points) between the averaged
+# grouped scores of the old DeepFace.analyze path and the single-detection path.
+TOLERANCE = 10.0
+
+# Define ANSI color codes for pretty printing in the terminal
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    CYAN = '\033[96m'
+    RESET = '\033[0m'
+
+
+def legacy_scores(faces):
+    """The previous path: DeepFace re-detects inside every tight SSD crop, one call per crop."""
+    from deepface import DeepFace
+    from emotion import group_emotions
+
+    scores = []
+    for face in faces:
+        try:
+            result = DeepFace.analyze(face, actions=['emotion'], enforce_detection=True, silent=True)
+            scores.append(group_emotions(result[0]['emotion']))
+        except Exception as e:
+            print(f"  {Colors.YELLOW}Legacy path skipped a frame: {e}{Colors.RESET}")
+    return scores
+
+
+def run_video(path, timings):
+    """Runs both paths on one video; returns (legacy average, new average)."""
+    from detector import detect_closest_boxes, crop
+    from emotion import classify_faces
+    from pipeline import average_scores, MAX_FRAMES
+    from sampler import sample_frames
+
+    start = time.perf_counter()
+    cap = cv2.VideoCapture(path)
+    try:
+        frames = sample_frames(cap, num_samples=MAX_FRAMES)
+    finally:
+        cap.release()
+    timings["decode"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    boxes = detect_closest_boxes(frames)
+    timings["ssd_detect"].append(time.perf_counter() - start)
+    found = [(frame, box) for frame, box in zip(frames, boxes) if box is not None]
+
+    start = time.perf_counter()
+    old = legacy_scores([crop(frame, box, margin=0) for frame, box in found])
+    timings["legacy_deepface_analyze"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    new = [s for s in classify_faces([crop(frame, box) for frame, box in found]) if s is not None]
+    timings["single_detection_classify"].append(time.perf_counter() - start)
+
+    return (average_scores(old) if old else None), (average_scores(new) if new else None)
+
+
+def run_tests(paths):
+    """
+    Compares emotion scores of the legacy DeepFace.analyze path against the
+    single-detection path on the given videos and prints per-stage timings.
+    """
+    print(f"{Colors.BLUE}--- Single-Detection Parity Check (tolerance {TOLERANCE} points) ---{Colors.RESET}\n")
+    timings = {"decode": [], "ssd_detect": [], "legacy_deepface_analyze": [], "single_detection_classify": []}
+    success_count = 0
+    compared = 0
+
+    for i, path in enumerate(paths):
+        print(f"[{i+1}/{len(paths)}] {Colors.CYAN}{path}{Colors.RESET}")
+        old, new = run_video(path, timings)
+        if old is None or new is None:
+            print(f"  {Colors.YELLOW}No comparable faces (legacy: {old is not None}, new: {new is not None}){Colors.RESET}")
+            print("-" * 50)
+            continue
+
+        compared += 1
+        worst = max(abs(old[emo] - new[emo]) for emo in old)
+        same_dominant = max(old, key=old.get) == max(new, key=new.get)
+        if worst <= TOLERANCE and same_dominant:
+            print(f"  {Colors.GREEN}✔ WITHIN TOLERANCE{Colors.RESET}")
+            success_count += 1
+        else:
+            print(f"  {Colors.RED}✖ OUT OF TOLERANCE{Colors.RESET}")
+        print(f"  Max difference: {worst:.2f} points | Dominant: '{max(old, key=old.get)}' -> '{max(new, key=new.get)}'")
+        print("-" * 50)
+
+    print(f"\n{Colors.BLUE}--- Stage Timings (mean per video) ---{Colors.RESET}")
+    for stage, values in timings.items():
+        if values:
+            print(f"  {stage:<28} {np.mean(values) * 1000:8.1f} ms")
+
+    color = Colors.GREEN if success_count == compared else Colors.RED
+    print(f"\nFinal Result: {color}{success_count}/{compared} compared videos within tolerance{Colors.RESET}")
+    return success_count == compared
+
+
+if __name__ == "__main__":
+    # Run from the model/ directory so the dnn/ paths resolve, e.g.
+    #   python check_parity.py clips/*.webm
+    if len(sys.argv) < 2:
+        print("Usage: python check_parity.py <video> [<video> ...]")
+        sys.exit(2)
+    sys.exit(0 if run_tests(sys.argv[1:]) else 1)
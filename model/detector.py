@@ -0,0 +1,78 @@
+# Batched res10 SSD face detection for sampled video frames.
+import os
+import cv2
+import numpy as np
+
+# DNN FACE DETECTOR SETUP
+prototxt_path = os.path.join("dnn", "deploy.prototxt.txt")
+caffemodel_path = os.path.join("dnn", "res10_300x300_ssd_iter_140000.caffemodel")
+net = None
+
+CONFIDENCE_THRESHOLD = 0.85
+MIN_FACE_SIZE = 50
+# Extra context around each detected box, as a fraction of its width/height per side
+FACE_MARGIN = float(os.getenv("FACE_MARGIN", "0.1"))
+
+
+def get_net():
+    """Loads the res10 SSD network once and reuses it."""
+    global net
+    if net is None:
+        net = cv2.dnn.readNetFromCaffe(prototxt_path, caffemodel_path)
+    return net
+
+
+def detect_closest_boxes(frames):
+    """
+    Runs the SSD network once over all frames and returns the (x1, y1, x2, y2) box
+    of the closest (largest) confident face in each frame, or None where there is none.
+    """
+    if not frames:
+        return []
+
+    blob = cv2.dnn.blobFromImages(frames, 1.0, (300, 300), (104, 117, 123))
+    ssd = get_net()
+    ssd.setInput(blob)
+    detections = ssd.forward()
+
+    max_areas = [0] * len(frames)
+    best_boxes = [None] * len(frames)
+
+    # Each detection row is [image_id, label, confidence, x1, y1, x2, y2]
+    for det in detections[0, 0]:
+        image_id = int(det[0])
+        confidence = det[2]
+        if image_id < 0 or confidence <= CONFIDENCE_THRESHOLD:
+            continue
+
+        h, w = frames[image_id].shape[:2]
+        box = det[3:7] * np.array([w, h, w, h])
+        x1, y1, x2, y2 = map(int, box)
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(w, x2), min(h, y2)
+
+        area = (x2 - x1) * (y2 - y1)
+        if y2 - y1 > MIN_FACE_SIZE and x2 - x1 > MIN_FACE_SIZE and area > max_areas[image_id]:
+            max_areas[image_id] = area
+            best_boxes[image_id] = (x1, y1, x2, y2)
+
+    return best_boxes
+
+
+def crop(frame, box, margin=FACE_MARGIN):
+    """Cuts the box out of the frame, grown by `margin` on every side and clipped to the frame."""
+    if box is None:
+        return None
+    x1, y1, x2, y2 = box
+    h, w = frame.shape[:2]
+    pad_x, pad_y = int((x2 - x1) * margin), int((y2 - y1) * margin)
+    return frame[max(0, y1 - pad_y):min(h, y2 + pad_y), max(0, x1 - pad_x):min(w, x2 + pad_x)]
+
+
+def detect_closest_faces(frames):
+    """Closest face crop for each frame (see detect_closest_boxes), or None."""
+    return [crop(frame, box) for frame, box in zip(frames, detect_closest_boxes(frames))]
+
+
+def get_closest_human_face(frame):
+    return detect_closest_faces([frame])[0]
@@ -0,0 +1,96 @@
+# Batched facial-emotion classification on top of DeepFace's emotion model.
+import os
+import cv2
+import numpy as np
+
+# Output order of DeepFace's emotion model
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+# Eye angles beyond this are more likely cascade misfires than tilted heads
+MAX_ALIGN_ANGLE = 30
+
+_emotion_model = None
+_eye_cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, "haarcascade_eye.xml"))
+
+
+def get_emotion_model():
+    """Builds DeepFace's emotion model once and reuses it."""
+    global _emotion_model
+    if _emotion_model is None:
+        # Imported here so the web process never pulls in TensorFlow when inference runs in the pool
+        from deepface import DeepFace
+        _emotion_model = DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+    return _emotion_model
+
+
+def group_emotions(emotions):
+    """Folds DeepFace's seven emotions into the five moods we have songs for."""
+    return {
+        'angry': emotions.get('angry', 0) + emotions.get('disgust', 0) + emotions.get('fear', 0),
+        'happy': emotions.get('happy', 0),
+        'sad': emotions.get('sad', 0),
+        'surprise': emotions.get('surprise', 0),
+        'neutral': emotions.get('neutral', 0),
+    }
+
+
+def align_face(face):
+    """Rotates a face crop so the eyes are level, like DeepFace's opencv backend does."""
+    gray = cv2.cvtColor(face, cv2.COLOR_BGR2GRAY)
+    # Eyes sit in the upper half of the crop; searching only there avoids mouth/nostril hits
+    eyes = _eye_cascade.detectMultiScale(gray[:gray.shape[0] // 2], 1.1, 10)
+    if len(eyes) < 2:
+        return face
+
+    eyes = sorted(eyes, key=lambda e: e[2] * e[3], reverse=True)[:2]
+    (lx, ly, lw, lh), (rx, ry, rw, rh) = sorted(eyes, key=lambda e: e[0])
+    angle = np.degrees(np.arctan2((ry + rh / 2) - (ly + lh / 2), (rx + rw / 2) - (lx + lw / 2)))
+    if abs(angle) > MAX_ALIGN_ANGLE:
+        return face
+
+    h, w = face.shape[:2]
+    rotation = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(face, rotation, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+
+def prepare_face(face):
+    """
+    Turns an SSD face crop (BGR) into the 48x48 grayscale input of the emotion model.
+    The crop goes straight to the model: DeepFace's own detection step is skipped.
+    """
+    from deepface.modules import preprocessing
+
+    if face.shape[0] == 0 or face.shape[1] == 0:
+        raise ValueError("Face crop has zero size.")
+
+    img = preprocessing.resize_image(img=align_face(face), target_size=(224, 224))
+    gray = cv2.cvtColor(img[0], cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (48, 48))
+
+
+def classify_faces(faces):
+    """
+    Scores every face crop in a single forward pass of the emotion model.
+    Returns one grouped score dict per crop, or None where the crop was skipped.
+    """
+    results = [None] * len(faces)
+    inputs, kept = [], []
+    for idx, face in enumerate(faces):
+        try:
+            inputs.append(prepare_face(face))
+            kept.append(idx)
+        except Exception as e:
+            print("Frame skipped:", e)
+
+    if not inputs:
+        return results
+
+    batch = np.stack(inputs)[..., np.newaxis]
+    predictions = get_emotion_model().model(batch, training=False).numpy()
+
+    for idx, prediction in zip(kept, predictions):
+        total = prediction.sum()
+        emotions = {label: float(100 * prediction[i] / total) for i, label in enumerate(EMOTION_LABELS)}
+        results[idx] = group_emotions(emotions)
+
+    return results
@@ -0,0 +1,69 @@
+# Face + text fusion: asks the text service for its emotion distribution while
+# the video is analyzed here, then blends the two.
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+TEXT_SERVICE_URL = os.getenv("TEXT_SERVICE_URL", "http://localhost:5001")
+TEXT_SERVICE_TIMEOUT_SECONDS = float(os.getenv("TEXT_SERVICE_TIMEOUT_SECONDS", "10"))
+# Relative weight of each modality; each request may override them
+FUSION_FACE_WEIGHT = float(os.getenv("FUSION_FACE_WEIGHT", "0.5"))
+FUSION_TEXT_WEIGHT = float(os.getenv("FUSION_TEXT_WEIGHT", "0.5"))
+
+# The text service says "surprised" where the face pipeline says "surprise"
+TEXT_LABELS = {"surprised": "surprise"}
+
+_text_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="text-service")
+_session = requests.Session()
+
+
+def parse_responses(values):
+    """Questionnaire answers from repeated `responses` form fields or a single JSON array."""
+    if len(values) == 1 and values[0].lstrip().startswith("["):
+        values = json.loads(values[0])
+    return [value for value in values if isinstance(value, str) and value.strip()]
+
+
+def _predict_text(responses):
+    response = _session.post(
+        f"{TEXT_SERVICE_URL}/text_emotion/predict",
+        json={"responses": responses},
+        timeout=TEXT_SERVICE_TIMEOUT_SECONDS,
+    )
+    body = response.json()
+    if response.status_code != 200:
+        raise RuntimeError(body.get("error", f"Text service returned {response.status_code}"))
+    return normalize({TEXT_LABELS.get(e["emotion"], e["emotion"]): e["confidence"] for e in body["all_emotions"]})
+
+
+def submit_text_prediction(responses):
+    """Starts the text-service call in the background; returns a Future of its normalized scores."""
+    return _text_executor.submit(_predict_text, responses)
+
+
+def normalize(scores):
+    total = sum(scores.values())
+    return {label: value / total for label, value in scores.items()} if total > 0 else None
+
+
+def as_percentages(scores):
+    return {label: round(value * 100, 2) for label, value in scores.items()} if scores else None
+
+
+def fuse(face_scores, text_scores, face_weight=FUSION_FACE_WEIGHT, text_weight=FUSION_TEXT_WEIGHT):
+    """
+    Weighted average of two normalized distributions. A missing modality
+    (None) drops out and the other one carries the whole weight.
+    """
+    parts = [(scores, weight) for scores, weight in ((face_scores, face_weight), (text_scores, text_weight))
+             if scores is not None and weight > 0]
+    total_weight = sum(weight for _, weight in parts)
+    if not total_weight:
+        return None
+    fused = {}
+    for scores, weight in parts:
+        for label, value in scores.items():
+            fused[label] = fused.get(label, 0.0) + value * weight / total_weight
+    return fused
@@ -0,0 +1,123 @@
+# Upload ingest: decode videos straight from the request body, spilling to disk only for large uploads.
+import os
+import tempfile
+from contextlib import contextmanager
+import cv2
+from flask import Request
+from sampler import VideoTooLong, reported_frame_count, MAX_PLAUSIBLE_FPS
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+# Uploads larger than this spill to disk; 0 or less spills every upload
+SPILL_BYTES = int(float(os.getenv("UPLOAD_SPILL_MB", "8")) * 1024 * 1024)
+MAX_VIDEO_SECONDS = float(os.getenv("MAX_VIDEO_SECONDS", "30"))
+DEFAULT_FPS = 30.0
+
+
+class SpooledUpload(tempfile.SpooledTemporaryFile):
+    """
+    A SpooledTemporaryFile that rolls over into a named temp file, so an
+    inference process can open a large upload by path instead of being sent its
+    bytes. The file is deleted when the request closes it.
+    """
+
+    def rollover(self):
+        if self._rolled:
+            return
+        memory = self._file
+        self._file = tempfile.NamedTemporaryFile(prefix="moodify-upload-")
+        self._file.write(memory.getvalue())
+        self._file.seek(memory.tell())
+        self._rolled = True
+
+    @property
+    def path(self):
+        """Path of the spilled file, or None while the upload is still in memory."""
+        return self._file.name if self._rolled else None
+
+
+class SpoolingRequest(Request):
+    """Keeps uploaded files in memory until they outgrow SPILL_BYTES."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload = SpooledUpload(max_size=max(SPILL_BYTES, 0))
+        # max_size=0 means "never roll over" to SpooledTemporaryFile
+        if SPILL_BYTES <= 0:
+            upload.rollover()
+        return upload
+
+
+def upload_source(stream):
+    """
+    What the inference process decodes: the temp file path of an upload that
+    spilled to disk, or the bytes of one still held in memory.
+    """
+    path = getattr(stream, "path", None)
+    if path:
+        stream.flush()
+        return path
+    stream.seek(0)
+    return stream.read()
+
+
+def hold_upload(source):
+    """
+    A spilled upload's temp file is deleted with its request, so a background
+    job gets its own link to the file; release_upload() removes it afterwards.
+    """
+    if not isinstance(source, str):
+        return source
+    held = f"{source}.job"
+    os.link(source, held)
+    return held
+
+
+def release_upload(source):
+    if isinstance(source, str) and os.path.exists(source):
+        os.unlink(source)
+
+
+def max_frames_for(cap):
+    """Frame budget that corresponds to MAX_VIDEO_SECONDS for this video."""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0 or fps > MAX_PLAUSIBLE_FPS:
+        fps = DEFAULT_FPS
+    return int(MAX_VIDEO_SECONDS * fps)
+
+
+def _open_from_disk(stream):
+    # Fallback for OpenCV builds without stream-buffered capture support
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
+        stream.seek(0)
+        while True:
+            chunk = stream.read(1024 * 1024)
+            if not chunk:
+                break
+            temp_video.write(chunk)
+    return cv2.VideoCapture(temp_video.name), temp_video.name
+
+
+@contextmanager
+def open_video(stream):
+    """
+    Opens an uploaded video stream (any seekable file object) as a cv2.VideoCapture
+    reading from the stream itself, and rejects videos longer than MAX_VIDEO_SECONDS.
+    """
+    stream.seek(0)
+    temp_path = None
+    try:
+        cap = cv2.VideoCapture(stream, cv2.CAP_FFMPEG, [])
+    except (TypeError, cv2.error):
+        cap = None
+    if cap is None or not cap.isOpened():
+        cap, temp_path = _open_from_disk(stream)
+
+    try:
+        max_frames = max_frames_for(cap)
+        # Only a trustworthy count rejects early; otherwise decoding enforces the limit
+        if reported_frame_count(cap) > max_frames:
+            raise VideoTooLong(f"Video is longer than {MAX_VIDEO_SECONDS:g} seconds.")
+        yield cap, max_frames
+    finally:
+        cap.release()
+        if temp_path and os.path.exists(temp_path):
+            os.unlink(temp_path)
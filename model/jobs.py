@@ -0,0 +1,129 @@
+# Background video-analysis jobs and the stores that keep their results.
+import abc
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# How long finished jobs stay retrievable
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "600"))
+# Upper bound for ?wait= on the status endpoint
+MAX_LONG_POLL_SECONDS = float(os.getenv("JOB_MAX_LONG_POLL_SECONDS", "30"))
+# "memory" (single process, good for tests) or "mongo" (shared between web workers)
+JOB_STORE = os.getenv("JOB_STORE", "memory")
+
+QUEUED, DONE, FAILED = "queued", "done", "failed"
+
+
+class JobStore(abc.ABC):
+    """
+    Interface for job backends. A job is a dict with at least `status`; finished
+    jobs also carry `analysis` or `error`/`code`, and expire JOB_TTL_SECONDS later.
+    """
+
+    @abc.abstractmethod
+    def create(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def finish(self, job_id, **fields):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def wait(self, job_id, timeout):
+        """Blocks up to `timeout` seconds for the job to finish, then returns it like get()."""
+        deadline = time.monotonic() + timeout
+        job = self.get(job_id)
+        while job is not None and job["status"] == QUEUED and time.monotonic() < deadline:
+            time.sleep(0.25)
+            job = self.get(job_id)
+        return job
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self, ttl=JOB_TTL_SECONDS):
+        self.ttl = ttl
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def _purge(self):
+        now = time.monotonic()
+        for job_id in [j for j, job in self._jobs.items() if job.get("expires", now + 1) <= now]:
+            del self._jobs[job_id]
+
+    def create(self):
+        job_id = uuid.uuid4().hex
+        with self._changed:
+            self._purge()
+            self._jobs[job_id] = {"status": QUEUED}
+        return job_id
+
+    def finish(self, job_id, **fields):
+        with self._changed:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields, expires=time.monotonic() + self.ttl)
+            self._changed.notify_all()
+
+    def get(self, job_id):
+        with self._changed:
+            self._purge()
+            job = self._jobs.get(job_id)
+            return {k: v for k, v in job.items() if k != "expires"} if job else None
+
+    def wait(self, job_id, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: self._jobs.get(job_id, {}).get("status") != QUEUED, timeout)
+        return self.get(job_id)
+
+
+class MongoJobStore(JobStore):
+    """Keeps jobs in a collection with a TTL index so every web worker sees them."""
+
+    def __init__(self, collection, ttl=JOB_TTL_SECONDS):
+        self.ttl = ttl
+        self.collection = collection
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            print("Could not create TTL index for analysis jobs:", e)
+
+    def create(self):
+        job_id = uuid.uuid4().hex
+        # Unfinished jobs also expire eventually, in case their worker died
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl * 2)
+        self.collection.insert_one({"_id": job_id, "status": QUEUED, "expires_at": expires_at})
+        return job_id
+
+    def finish(self, job_id, **fields):
+        fields["expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        self.collection.update_one({"_id": job_id}, {"$set": fields})
+
+    def get(self, job_id):
+        return self.collection.find_one({"_id": job_id}, {"_id": 0, "expires_at": 0})
+
+
+def create_job_store(db):
+    if JOB_STORE == "mongo":
+        return MongoJobStore(db.analysis_jobs)
+    return InMemoryJobStore()
+
+
+def submit_job(store, future, error_code):
+    """
+    Registers a job for an already submitted analysis Future and records its
+    outcome when it completes. `error_code` maps an exception to an HTTP status.
+    """
+    job_id = store.create()
+
+    def record(done):
+        try:
+            store.finish(job_id, status=DONE, analysis=done.result())
+        except Exception as e:
+            store.finish(job_id, status=FAILED, error=str(e), code=error_code(e))
+
+    future.add_done_callback(record)
+    return job_id
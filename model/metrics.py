@@ -0,0 +1,99 @@
+# Prometheus metrics for the video service, plus optional Server-Timing headers.
+# textModel/metrics.py carries its own copy of the request hook; the services share no code.
+import os
+import time
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context
+from prometheus_client import Counter, Histogram, Gauge, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# "1" adds a Server-Timing header with the stage durations of each response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+request_seconds = Histogram(
+    "moodify_request_seconds", "HTTP request latency", ["endpoint", "method", "status"], buckets=STAGE_BUCKETS
+)
+stage_seconds = Histogram(
+    "moodify_stage_seconds", "Time spent in each stage of the video pipeline", ["stage"], buckets=STAGE_BUCKETS
+)
+frames_total = Counter("moodify_frames", "Sampled video frames by outcome", ["outcome"])
+batch_size = Histogram(
+    "moodify_model_batch_size", "Inputs per model forward pass", ["model"], buckets=(1, 2, 4, 8, 12, 16, 24, 32, 64)
+)
+inference_queue_depth = Gauge("moodify_inference_queue_depth", "Videos running or waiting for an inference worker")
+
+
+class CacheCollector:
+    """Exposes the stats() of every registered cache under a `cache` label."""
+
+    def __init__(self):
+        self.caches = {}
+
+    def collect(self):
+        hits = CounterMetricFamily("moodify_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("moodify_cache_misses", "Cache misses", labels=["cache"])
+        hit_rate = GaugeMetricFamily("moodify_cache_hit_rate", "Hits per lookup since start", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            hit_rate.add_metric([name], stats["hit_rate"])
+        yield from (hits, misses, hit_rate)
+
+
+_caches = CacheCollector()
+REGISTRY.register(_caches)
+
+
+def register_cache(name, cache):
+    _caches.caches[name] = cache
+
+
+def record_stage(stage, seconds):
+    stage_seconds.labels(stage).observe(seconds)
+    if SERVER_TIMING and has_request_context():
+        g.setdefault("server_timing", []).append((stage, seconds))
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def record_analysis(analysis):
+    """Records the stage timings, frame outcomes and batch sizes a pipeline run reported."""
+    for stage, seconds in analysis.get("timings", {}).items():
+        record_stage(stage, seconds)
+    for outcome, count in analysis.get("frames", {}).items():
+        frames_total.labels(outcome).inc(count)
+    for model, sizes in analysis.get("batch_sizes", {}).items():
+        for size in sizes:
+            batch_size.labels(model).observe(size)
+
+
+def init_app(app):
+    """Times every request and, with SERVER_TIMING=1, reports its stages in a header."""
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop("request_start", None)
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        request_seconds.labels(endpoint, request.method, str(response.status_code)).observe(total)
+        if SERVER_TIMING:
+            entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in g.get("server_timing", [])]
+            response.headers["Server-Timing"] = ", ".join(entries + [f"total;dur={total * 1000:.1f}"])
+        return response
@@ -0,0 +1,210 @@
+# Adaptive /analyze pipeline: score frames in rounds until the emotion estimate settles.
+import os
+import threading
+import time
+from contextlib import contextmanager
+import cv2
+import numpy as np
+from detector import detect_closest_faces
+from emotion import classify_faces
+from ingest import open_video
+from sampler import sample_frames
+from tracker import FaceLocator
+
+# Candidate frames decoded per video; the rounds below decide how many get scored
+MAX_FRAMES = int(os.getenv("ANALYZE_MAX_FRAMES", "24"))
+FIRST_ROUND = int(os.getenv("ANALYZE_FIRST_ROUND", "4"))
+ROUND_SIZE = int(os.getenv("ANALYZE_ROUND_SIZE", "4"))
+# Stop once the top-two margin moves less than this between rounds
+MARGIN_TOLERANCE = float(os.getenv("ANALYZE_MARGIN_TOLERANCE", "2.0"))
+# Per-request time budget, shrunk while other /analyze requests are in flight
+BUDGET_SECONDS = float(os.getenv("ANALYZE_BUDGET_SECONDS", "3.0"))
+MIN_BUDGET_SECONDS = float(os.getenv("ANALYZE_MIN_BUDGET_SECONDS", "0.5"))
+LOAD_FACTOR = float(os.getenv("ANALYZE_LOAD_FACTOR", "0.5"))
+# Frames whose 16x16 thumbnails differ by less than this (mean absolute grey level) reuse an earlier frame's result
+DUPLICATE_THRESHOLD = float(os.getenv("ANALYZE_DUPLICATE_THRESHOLD", "3.0"))
+SIGNATURE_SIZE = 16
+# "detect" runs SSD on every analyzed frame; "track" follows faces from neighbouring frames where it can
+FACE_LOCALIZER = os.getenv("FACE_LOCALIZER", "detect")
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+@contextmanager
+def request_budget():
+    """Tracks concurrent /analyze requests and yields this request's deadline."""
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+        others = _in_flight - 1
+    try:
+        budget = max(MIN_BUDGET_SECONDS, BUDGET_SECONDS / (1 + LOAD_FACTOR * others))
+        yield time.monotonic() + budget
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+def average_scores(emotions_list, weights=None):
+    if weights is None:
+        weights = [1] * len(emotions_list)
+
+    avg_scores = {emo: 0 for emo in emotions_list[0].keys()}
+    for emo_dict, weight in zip(emotions_list, weights):
+        for emo, val in emo_dict.items():
+            avg_scores[emo] += val * weight
+
+    total_weight = sum(weights)
+    for emo in avg_scores:
+        avg_scores[emo] /= total_weight
+    return avg_scores
+
+
+def frame_signature(frame):
+    """Downscaled greyscale thumbnail used to spot near-identical frames."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (SIGNATURE_SIZE, SIGNATURE_SIZE), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def find_duplicate(signature, seen):
+    """Returns the index of the first seen signature close enough to `signature`, or None."""
+    for idx, other in enumerate(seen):
+        if np.abs(signature - other).mean() < DUPLICATE_THRESHOLD:
+            return idx
+    return None
+
+
+def top_two_margin(avg_scores):
+    ranked = sorted(avg_scores.values(), reverse=True)
+    return ranked[0] - ranked[1] if len(ranked) > 1 else ranked[0]
+
+
+def progressive_order(n, first=FIRST_ROUND):
+    """
+    Orders frame indices coarse-to-fine: an evenly spaced first round, then
+    the midpoint of the widest remaining gap, so every prefix covers the clip.
+    """
+    if n <= first:
+        return list(range(n))
+
+    chosen = sorted({round(i * (n - 1) / (first - 1)) for i in range(first)}) if first > 1 else [n // 2]
+    order = list(chosen)
+    while len(order) < n:
+        bounds = [-1] + chosen + [n]
+        gap_start, gap_end = max(zip(bounds, bounds[1:]), key=lambda g: g[1] - g[0])
+        mid = (gap_start + gap_end) // 2
+        order.append(mid)
+        chosen = sorted(chosen + [mid])
+    return order
+
+
+def analyze_frames(frames, deadline, times=None):
+    """
+    Detects and scores frames round by round and stops when the top-two margin
+    is stable, the frames run out, or the next round would overrun the deadline.
+    Frames nearly identical to an already analyzed one skip inference and add
+    weight to that frame's scores instead. With FACE_LOCALIZER=track, a frame next
+    to an already located one (per `times`, the frames' timestamps in seconds)
+    tracks that face instead of going through SSD.
+
+    Returns a dict with the weighted average scores (None if no face was scored),
+    the number of frames they represent, the number that went through inference,
+    the seconds spent in each stage, per-outcome frame counts and the batch
+    sizes sent to each model.
+    """
+    timings = {"dedup": 0.0, "detect": 0.0, "classify": 0.0}
+    counts = {"decoded": len(frames), "skipped": 0, "duplicate": 0, "no_face": 0, "failed": 0, "analyzed": 0}
+    batch_sizes = {"detect": [], "classify": []}
+    if FACE_LOCALIZER == "track":
+        locator = FaceLocator(frames, times)
+        # The locator records only the SSD passes it actually ran
+        batch_sizes["detect"] = locator.batch_sizes
+        locate_faces = locator.locate
+    else:
+        locate_faces = lambda indices: detect_closest_faces([frames[i] for i in indices])
+
+    order = progressive_order(len(frames))
+    # One entry per analyzed frame: its signature, its scores (None without a face) and its weight
+    signatures, scores_list, weights = [], [], []
+    prev_margin = None
+    start = 0
+    round_size = FIRST_ROUND
+
+    while start < len(order):
+        round_start = time.monotonic()
+        stage_start = time.perf_counter()
+        batch = []
+        for i in order[start:start + round_size]:
+            signature = frame_signature(frames[i])
+            duplicate = find_duplicate(signature, signatures)
+            if duplicate is not None:
+                weights[duplicate] += 1
+                counts["duplicate"] += 1
+            else:
+                signatures.append(signature)
+                scores_list.append(None)
+                weights.append(1)
+                batch.append((len(signatures) - 1, i))
+        start += round_size
+        round_size = ROUND_SIZE
+        timings["dedup"] += time.perf_counter() - stage_start
+
+        # Locate the closest face in every new frame, then score all crops in one batch
+        stage_start = time.perf_counter()
+        faces = locate_faces([i for _, i in batch])
+        with_face = [(slot, face) for (slot, _), face in zip(batch, faces) if face is not None]
+        timings["detect"] += time.perf_counter() - stage_start
+        if FACE_LOCALIZER != "track" and batch:
+            batch_sizes["detect"].append(len(batch))
+        counts["no_face"] += len(batch) - len(with_face)
+
+        stage_start = time.perf_counter()
+        for (slot, _), scores in zip(with_face, classify_faces([face for _, face in with_face])):
+            scores_list[slot] = scores
+            counts["analyzed" if scores is not None else "failed"] += 1
+        timings["classify"] += time.perf_counter() - stage_start
+        if with_face:
+            batch_sizes["classify"].append(len(with_face))
+
+        scored = [(scores, weight) for scores, weight in zip(scores_list, weights) if scores is not None]
+        if scored:
+            margin = top_two_margin(average_scores(*zip(*scored)))
+            if prev_margin is not None and abs(margin - prev_margin) < MARGIN_TOLERANCE:
+                break
+            prev_margin = margin
+
+        now = time.monotonic()
+        if now + (now - round_start) > deadline:
+            break
+
+    counts["skipped"] = len(frames) - min(start, len(order))
+    scored = [(scores, weight) for scores, weight in zip(scores_list, weights) if scores is not None]
+    analysis = {"frames": counts, "batch_sizes": batch_sizes, "timings": timings}
+    if not scored:
+        return {"scores": None, "frames_used": 0, "frames_scored": 0, **analysis}
+    return {
+        "scores": average_scores(*zip(*scored)),
+        "frames_used": sum(weight for _, weight in scored),
+        "frames_scored": len(scored),
+        **analysis,
+    }
+
+
+def analyze_video(stream, deadline=None):
+    """
+    Decodes an uploaded video stream into candidate frames and runs analyze_frames() on them.
+    Without a deadline (background jobs) the full budget starts now.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + BUDGET_SECONDS
+    start = time.perf_counter()
+    # Decode straight from the upload stream; sample evenly spaced candidate frames in one pass
+    with open_video(stream) as (cap, max_frames):
+        frames, times = sample_frames(cap, num_samples=MAX_FRAMES, max_frames=max_frames, with_times=True)
+    decode_seconds = time.perf_counter() - start
+
+    # Score frames in rounds until the averaged scores settle or the budget runs out
+    analysis = analyze_frames(frames, deadline, times)
+    analysis["timings"]["decode"] = decode_seconds
+    return analysis
@@ -1,45 +1,49 @@
-from flask import request, jsonify
-from deepface import DeepFace
-import tempfile
-import os
-import cv2
-import numpy as np
+from flask import request, jsonify, Response, stream_with_context
 from __init__ import app, db
 from flask_cors import CORS
 import cloudinary
 import cloudinary.uploader
 from bson.objectid import ObjectId
+from pipeline import request_budget
+from sampler import VideoTooLong
+from workers import (inference_slot, acquire_slot, release_slot, run_analysis, submit_analysis,
+                     pool_ready, pool_stats, queue_depth, PoolSaturated, RETRY_AFTER_SECONDS)
+from jobs import create_job_store, submit_job, MAX_LONG_POLL_SECONDS
+from cache import result_cache, content_key
+from ingest import upload_source, hold_upload, release_upload
+from fusion import (submit_text_prediction, parse_responses, normalize, fuse, as_percentages,
+                    FUSION_FACE_WEIGHT, FUSION_TEXT_WEIGHT)
+from catalog import (SongCatalog, ALL, ensure_indexes, find_page, stream_songs,
+                     parse_projection, SONGS_PAGE_SIZE, SONGS_PAGE_MAX)
+from metrics import (init_app as init_metrics, timed, record_analysis, register_cache,
+                     inference_queue_depth)
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from concurrent.futures import Future
+from werkzeug.exceptions import RequestEntityTooLarge
 
 CORS(app)
-# DNN FACE DETECTOR SETUP
-prototxt_path = os.path.join("dnn", "deploy.prototxt.txt")
-caffemodel_path = os.path.join("dnn", "res10_300x300_ssd_iter_140000.caffemodel")
-net = cv2.dnn.readNetFromCaffe(prototxt_path, caffemodel_path)
 
-def get_closest_human_face(frame):
-    h, w = frame.shape[:2]
-    blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104, 117, 123))
-    net.setInput(blob)
-    detections = net.forward()
+job_store = create_job_store(db)
+ensure_indexes(db.songs_by_emotion)
+catalog = SongCatalog(db.songs_by_emotion)
 
-    max_area = 0
-    best_face = None
+init_metrics(app)
+register_cache("result", result_cache)
+register_cache("catalog", catalog)
+inference_queue_depth.set_function(queue_depth)
 
-    for i in range(detections.shape[2]):
-        confidence = detections[0, 0, i, 2]
-        if confidence > 0.85:
-            box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-            x1, y1, x2, y2 = map(int, box)
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(w, x2), min(h, y2)
 
-            face = frame[y1:y2, x1:x2]
-            area = (x2 - x1) * (y2 - y1)
-            if face.shape[0] > 50 and face.shape[1] > 50 and area > max_area:
-                max_area = area
-                best_face = face
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({"error": "Uploaded file is too large"}), 413
 
-    return best_face
+
+@app.errorhandler(PoolSaturated)
+def inference_busy(e):
+    # Fail fast instead of letting requests pile up behind a full inference queue
+    response = jsonify({"error": str(e)})
+    response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+    return response, 503
 
 
 @app.route('/')
@@ -47,104 +51,279 @@ def index():
     return jsonify({"message": "Flask backend running"})
 
 
+@app.route('/healthz', methods=['GET'])
+def liveness():
+    return jsonify({"status": "alive"}), 200
+
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    # The load balancer only routes traffic here once every model is loaded and warm
+    ready = pool_ready()
+    return jsonify({
+        "status": "ready" if ready else "warming up",
+        "models": pool_stats(),
+        "queue_depth": queue_depth(),
+        "result_cache": result_cache.stats()
+    }), 200 if ready else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+
 # 🔹 UPDATED /analyze ROUTE
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    if 'video' not in request.files:
+    upload = read_video_upload()
+    if upload is None:
         return jsonify({"error": "No video file provided"}), 400
 
-    video = request.files['video']
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
-        video_path = temp_video.name
-        video.save(video_path)
-
     try:
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if total_frames == 0:
-            raise Exception("Video has no frames.")
-
-        emotions_list = []
-        # Sample 5 evenly spaced frames
-        frame_indices = np.linspace(0, total_frames - 1, 5, dtype=int)
-
-        for i in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-            success, frame = cap.read()
-            if not success:
-                continue
-
-            # Detect face
-            face = get_closest_human_face(frame)
-            if face is None:
-                continue
-
-            try:
-                result = DeepFace.analyze(face, actions=['emotion'], enforce_detection=True)
-                emotions = result[0]['emotion']
-
-                grouped = {
-                    'angry': emotions.get('angry', 0) + emotions.get('disgust', 0) + emotions.get('fear', 0),
-                    'happy': emotions.get('happy', 0),
-                    'sad': emotions.get('sad', 0),
-                    'surprise': emotions.get('surprise', 0),
-                    'neutral': emotions.get('neutral', 0),
-                }
-                emotions_list.append(grouped)
-
-            except Exception as e:
-                print("Frame skipped:", e)
-
-        cap.release()
-
-        if not emotions_list:
-            return jsonify({"error": "No valid human face detected in video"}), 422
-
-        # Average scores across frames
-        avg_scores = {emo: 0 for emo in emotions_list[0].keys()}
-        for emo_dict in emotions_list:
-            for emo, val in emo_dict.items():
-                avg_scores[emo] += val
-
-        for emo in avg_scores:
-            avg_scores[emo] /= len(emotions_list)
-
-        # Pick dominant emotion with threshold check
-        sorted_emotions = sorted(avg_scores.items(), key=lambda x: x[1], reverse=True)
-        if len(sorted_emotions) > 1 and (sorted_emotions[0][1] - sorted_emotions[1][1]) < 10:
-            dominant_emotion = "angry"  # fallback if too close
-        else:
-            dominant_emotion = sorted_emotions[0][0]
+        analysis = analyze_upload(upload)
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)}), error_status(e)
+
+    body, status = build_analysis_response(analysis)
+    return jsonify(body), status
+
+
+def read_video_upload():
+    """
+    Receives the uploaded video as (cache key, source for the inference process),
+    or None if the request has no video. Large uploads stay in their temp file.
+    """
+    with timed("upload"):
+        if 'video' not in request.files:
+            return None
+        stream = request.files['video'].stream
+        return content_key(stream), upload_source(stream)
+
+
+def analyze_upload(upload):
+    """Runs the video pipeline on an upload, or returns its cached analysis."""
+    cache_key, source = upload
+    # Retried or replayed uploads skip decoding and inference entirely
+    analysis = result_cache.get(cache_key)
+    if analysis is None:
+        # Reserve a place in the inference queue or fail fast with 503
+        with inference_slot():
+            with request_budget() as deadline:
+                # Decode, detect and classify in an inference worker process
+                with timed("inference"):
+                    analysis = run_analysis(source, deadline)
+        record_analysis(analysis)
+        result_cache.put(cache_key, analysis)
+    return analysis
+
+
+def error_status(e):
+    return 413 if isinstance(e, VideoTooLong) else 500
+
+
+def build_analysis_response(analysis):
+    """Turns a pipeline analysis into the /analyze response body and status code."""
+    avg_scores = analysis["scores"]
+    if avg_scores is None:
+        return {"error": "No valid human face detected in video"}, 422
+
+    # Pick dominant emotion with threshold check
+    sorted_emotions = sorted(avg_scores.items(), key=lambda x: x[1], reverse=True)
+    if len(sorted_emotions) > 1 and (sorted_emotions[0][1] - sorted_emotions[1][1]) < 10:
+        dominant_emotion = "angry"  # fallback if too close
+    else:
+        dominant_emotion = sorted_emotions[0][0]
+
+    raw_score = avg_scores[dominant_emotion]
+    total = sum(avg_scores.values())
+    confidence = (raw_score / total) * 100 if total > 0 else 0
+    confidence = max(83.0, min(confidence * 1.2, 98.0))  # Boost confidence
+
+    with timed("songs"):
+        songs = catalog.songs(dominant_emotion)
+
+    return {
+        "emotion": dominant_emotion,
+        "confidence": confidence,
+        "frames_used": analysis["frames_used"],
+        "frames_scored": analysis["frames_scored"],
+        "songs": songs
+    }, 200
+
+
+@app.route('/analyze/multimodal', methods=['POST'])
+def analyze_multimodal():
+    """
+    Face + questionnaire in one call: the text service is queried while the
+    video is analyzed, and the two distributions are blended with
+    face_weight/text_weight (form fields, defaulting to FUSION_*_WEIGHT).
+    """
+    upload = read_video_upload()
+    if upload is None:
+        return jsonify({"error": "No video file provided"}), 400
+    try:
+        responses = parse_responses(request.form.getlist('responses'))
+    except ValueError:
+        return jsonify({"error": "responses must be form fields or a JSON array of strings"}), 400
+    if not responses:
+        return jsonify({"error": "No text responses provided"}), 400
+    face_weight = request.form.get('face_weight', FUSION_FACE_WEIGHT, type=float)
+    text_weight = request.form.get('text_weight', FUSION_TEXT_WEIGHT, type=float)
+
+    text_future = submit_text_prediction(responses)
+
+    face = {"weight": face_weight}
+    analysis = None
+    try:
+        analysis = analyze_upload(upload)
+        face["scores"] = normalize(analysis["scores"]) if analysis["scores"] else None
+        if face["scores"] is None:
+            face["error"] = "No valid human face detected in video"
+    except PoolSaturated:
+        text_future.cancel()
+        raise
+    except Exception as e:
+        face["scores"], face["error"] = None, str(e)
 
-        raw_score = avg_scores[dominant_emotion]
-        total = sum(avg_scores.values())
-        confidence = (raw_score / total) * 100 if total > 0 else 0
-        confidence = max(83.0, min(confidence * 1.2, 98.0))  # Boost confidence
+    text = {"weight": text_weight}
+    try:
+        # Only the part of the text call that outlasted the video analysis
+        with timed("text_service_wait"):
+            text["scores"] = text_future.result()
+    except Exception as e:
+        print("Text service call failed:", e)
+        text["scores"], text["error"] = None, f"Text emotion service failed: {e}"
+
+    fused = fuse(face["scores"], text["scores"], face_weight, text_weight)
+    if fused is None:
+        for part in (face, text):
+            part["scores"] = as_percentages(part["scores"])
+        return jsonify({"error": "Could not determine an emotion from the video or the text",
+                        "face": face, "text": text}), 422
+
+    dominant_emotion = max(fused, key=fused.get)
+    for part in (face, text):
+        part["scores"] = as_percentages(part["scores"])
+    with timed("songs"):
+        songs = catalog.songs(dominant_emotion)
+    return jsonify({
+        "emotion": dominant_emotion,
+        "confidence": round(fused[dominant_emotion] * 100, 2),
+        "scores": as_percentages(fused),
+        "face": face,
+        "text": text,
+        "frames_used": analysis["frames_used"] if analysis else 0,
+        "songs": songs
+    }), 200
+
+
+@app.route('/analyze/jobs', methods=['POST'])
+def submit_analysis_job():
+    upload = read_video_upload()
+    if upload is None:
+        return jsonify({"error": "No video file provided"}), 400
 
-        # MongoDB fetch
-        songs = list(db.songs_by_emotion.find({"emotion": dominant_emotion}))
-        for song in songs:
-            song['_id'] = str(song['_id'])
+    cache_key, source = upload
+    analysis = result_cache.get(cache_key)
+    if analysis is not None:
+        future = Future()
+        future.set_result(analysis)
+    else:
+        # Same backpressure as /analyze, but the slot is held until the job finishes
+        acquire_slot()
+        held = None
+        try:
+            # The job outlives this request, and with it the upload's temp file
+            held = hold_upload(source)
+            future = submit_analysis(held)
+        except Exception:
+            release_upload(held)
+            release_slot()
+            raise
+        future.add_done_callback(lambda _: release_upload(held))
+        future.add_done_callback(lambda _: release_slot())
+
+        def cache_result(done):
+            if done.exception() is None:
+                record_analysis(done.result())
+                result_cache.put(cache_key, done.result())
+        future.add_done_callback(cache_result)
+
+    job_id = submit_job(job_store, future, error_status)
+    response = jsonify({"job_id": job_id, "status": "queued", "status_url": f"/analyze/jobs/{job_id}"})
+    response.headers["Location"] = f"/analyze/jobs/{job_id}"
+    return response, 202
+
+
+@app.route('/analyze/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    # ?wait=<seconds> long-polls until the job finishes
+    wait = min(request.args.get('wait', 0, type=float), MAX_LONG_POLL_SECONDS)
+    job = job_store.wait(job_id, wait) if wait > 0 else job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+
+    body = {"job_id": job_id, "status": job["status"]}
+    if job["status"] == "done":
+        # Songs are looked up when the result is read, not when it was computed
+        result, status = build_analysis_response(job["analysis"])
+        body["result"] = result
+        body["code"] = status
+    elif job["status"] == "failed":
+        body["error"] = job["error"]
+        body["code"] = job["code"]
+    return jsonify(body), 200
+
+
+def catalog_response(entry):
+    """Serves a pre-serialized catalog entry, or 304 if the client's copy is current."""
+    response = Response(entry.body, mimetype="application/json")
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    # Clients may keep the list but must revalidate it before reuse
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def list_songs(emotion=ALL):
+    """
+    Song listing for both GET routes. Without paging arguments the cached full
+    list is served; ?cursor=, ?limit=, ?fields= or ?format=ndjson read pages
+    straight from Mongo in _id order instead.
+    """
+    args = request.args
+    if not any(name in args for name in ("cursor", "limit", "fields", "format")):
+        return catalog_response(catalog.get(emotion))
+
+    cursor = args.get("cursor")
+    if cursor is not None and not ObjectId.is_valid(cursor):
+        return jsonify({"error": "Invalid cursor"}), 400
+    after = ObjectId(cursor) if cursor else None
+    try:
+        projection = parse_projection(args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        return jsonify({
-            "emotion": dominant_emotion,
-            "confidence": confidence,
-            "songs": songs
-        }), 200
+    if args.get("format") == "ndjson":
+        # Streams every remaining song unless a limit is given
+        limit = min(max(args.get("limit", 0, type=int), 0), SONGS_PAGE_MAX) if "limit" in args else 0
+        lines = stream_songs(db.songs_by_emotion, emotion, after, limit, projection)
+        return Response(stream_with_context(lines), mimetype="application/x-ndjson")
 
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        if os.path.exists(video_path):
-            os.unlink(video_path)
+    limit = min(max(args.get("limit", SONGS_PAGE_SIZE, type=int), 1), SONGS_PAGE_MAX)
+    songs, next_cursor = find_page(db.songs_by_emotion, emotion, after, limit, projection)
+    body = {"songs": songs, "next_cursor": next_cursor}
+    if emotion is not ALL:
+        body["emotion"] = emotion
+    return jsonify(body), 200
 
 
 @app.route('/api/songs/<emotion>', methods=['GET'])
 def get_songs_by_emotion(emotion):
-    songs = list(db.songs_by_emotion.find({"emotion": emotion}))
-    for song in songs:
-        song['_id'] = str(song['_id'])
-    return jsonify({"emotion": emotion, "songs": songs}), 200
+    return list_songs(emotion.lower())
 
 
 @app.route("/api/songs", methods=["POST"])
@@ -160,6 +339,9 @@ def add_song():
         if not all([song_mood, song_name, song_artist, song_file, song_image]):
             return jsonify({"error": "All fields are required"}), 400
 
+        # Emotions are stored lowercase so lookups can match them exactly
+        song_mood = song_mood.strip().lower()
+
         song_upload = cloudinary.uploader.upload(
             song_file,
             resource_type="video",
@@ -180,6 +362,7 @@ def add_song():
         }
 
         db.songs_by_emotion.insert_one(song_data)
+        catalog.invalidate(song_mood)
         song_data['_id'] = str(song_data['_id'])
 
         return jsonify(song_data), 201
@@ -192,10 +375,7 @@ def add_song():
 @app.route('/api/songs', methods=['GET'])
 def get_all_songs():
     try:
-        songs = list(db.songs_by_emotion.find({}))
-        for song in songs:
-            song['_id'] = str(song['_id'])
-        return jsonify(songs), 200
+        return list_songs()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -206,9 +386,10 @@ def delete_song(id):
         if not ObjectId.is_valid(id):
             return jsonify({"error": "Invalid song ID"}), 400
 
-        result = db.songs_by_emotion.delete_one({"_id": ObjectId(id)})
+        deleted = db.songs_by_emotion.find_one_and_delete({"_id": ObjectId(id)}, {"emotion": 1})
 
-        if result.deleted_count == 1:
+        if deleted is not None:
+            catalog.invalidate(deleted.get("emotion"))
             return jsonify({"message": "Song deleted successfully"}), 200
         else:
             return jsonify({"error": "Song not found"}), 404
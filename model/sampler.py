@@ -0,0 +1,108 @@
+# Seek-free frame sampling: decode the video once, front to back.
+import cv2
+import numpy as np
+
+NUM_SAMPLES = 5
+# A container reporting a frame rate above this (MediaRecorder WebM often reports
+# its 1 kHz timebase) reports a frame count derived from it, too
+MAX_PLAUSIBLE_FPS = 240
+
+
+class VideoTooLong(Exception):
+    pass
+
+
+def _check_length(index, max_frames):
+    if max_frames is not None and index >= max_frames:
+        raise VideoTooLong("Video is longer than the allowed duration.")
+
+
+def reported_frame_count(cap):
+    """The container's frame count, or 0 when it is missing or cannot be trusted."""
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if total_frames <= 0 or not fps or fps <= 0 or fps > MAX_PLAUSIBLE_FPS:
+        return 0
+    return total_frames
+
+
+def _rewind(cap):
+    return cap.set(cv2.CAP_PROP_POS_FRAMES, 0) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == 0
+
+
+def _sample_by_index(cap, total_frames, num_samples, max_frames=None):
+    """
+    Grabs every frame in order and only retrieves the evenly spaced targets.
+    Returns (frame, seconds) pairs and how many frames were grabbed, which is
+    less than `total_frames` when the container over-reported its length.
+    """
+    targets = set(np.linspace(0, total_frames - 1, num_samples, dtype=int).tolist())
+    last_target = max(targets)
+    frames = []
+
+    index = 0
+    while index <= last_target and cap.grab():
+        _check_length(index, max_frames)
+        if index in targets:
+            success, frame = cap.retrieve()
+            if success:
+                frames.append((frame, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000))
+        index += 1
+
+    return frames, index
+
+
+def _sample_by_reservoir(cap, num_samples, max_frames=None):
+    """
+    Used when the container does not report a frame count (e.g. MediaRecorder WebM).
+    Keeps every `stride`-th frame in a bounded buffer and doubles the stride when it
+    fills up, so the kept frames stay evenly spread over however long the video is.
+    """
+    capacity = 2 * num_samples
+    stride = 1
+    kept = []
+
+    index = 0
+    while cap.grab():
+        _check_length(index, max_frames)
+        if index % stride == 0:
+            success, frame = cap.retrieve()
+            if success:
+                kept.append((frame, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000))
+                if len(kept) > capacity:
+                    kept = kept[::2]
+                    stride *= 2
+        index += 1
+
+    if len(kept) <= num_samples:
+        return kept
+    picks = np.linspace(0, len(kept) - 1, num_samples, dtype=int)
+    return [kept[i] for i in picks]
+
+
+def sample_frames(cap, num_samples=NUM_SAMPLES, max_frames=None, with_times=False):
+    """
+    Returns up to `num_samples` evenly spaced frames in a single forward decode,
+    skipping unwanted frames with grab() instead of seeking (a container that
+    badly over-reports its length is decoded a second time). Raises VideoTooLong
+    once more than `max_frames` frames have been decoded. With `with_times`,
+    returns the frames and their timestamps in seconds.
+    """
+    total_frames = reported_frame_count(cap)
+    if total_frames > 0:
+        frames, decoded = _sample_by_index(cap, total_frames, num_samples, max_frames)
+        # The frames kept are still spread over the real clip, just fewer of them. If the
+        # count was far off, decode once more over the length actually found.
+        if 0 < decoded < total_frames and len(frames) < num_samples // 2:
+            if _rewind(cap):
+                frames, _ = _sample_by_index(cap, decoded, num_samples, max_frames)
+            else:
+                print(f"Video reported {total_frames} frames but has {decoded}; using {len(frames)} samples")
+    else:
+        frames = _sample_by_reservoir(cap, num_samples, max_frames)
+
+    if not frames:
+        raise Exception("Video has no frames.")
+    if with_times:
+        return [frame for frame, _ in frames], [seconds for _, seconds in frames]
+    return [frame for frame, _ in frames]
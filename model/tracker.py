@@ -0,0 +1,90 @@
+# Detect-then-track face localization: SSD where needed, a cheap OpenCV tracker from neighbouring frames.
+import os
+import cv2
+from detector import detect_closest_boxes, crop, MIN_FACE_SIZE
+
+# Track only between sampled frames at most this far apart; KCF assumes small motion
+TRACK_MAX_GAP_SECONDS = float(os.getenv("TRACK_MAX_GAP_SECONDS", "0.25"))
+# A tracked box whose area drifts this far from the detected one is treated as lost
+MAX_SCALE_DRIFT = float(os.getenv("TRACK_MAX_SCALE_DRIFT", "1.6"))
+
+
+def _create_tracker():
+    # KCF ships with opencv-contrib; MIL is the fallback in plain opencv-python
+    if hasattr(cv2, "TrackerKCF_create"):
+        return cv2.TrackerKCF_create()
+    return cv2.TrackerMIL_create()
+
+
+def _start_tracker(frame, box):
+    x1, y1, x2, y2 = box
+    tracker = _create_tracker()
+    tracker.init(frame, (x1, y1, x2 - x1, y2 - y1))
+    return tracker
+
+
+def _update_tracker(tracker, frame, anchor_area):
+    """Advances the tracker one frame; returns the new box, or None when tracking is unreliable."""
+    ok, (x, y, w, h) = tracker.update(frame)
+    if not ok:
+        return None
+
+    frame_h, frame_w = frame.shape[:2]
+    x1, y1 = max(0, int(x)), max(0, int(y))
+    x2, y2 = min(frame_w, int(x + w)), min(frame_h, int(y + h))
+    if x2 - x1 <= MIN_FACE_SIZE or y2 - y1 <= MIN_FACE_SIZE:
+        return None
+
+    drift = (x2 - x1) * (y2 - y1) / anchor_area
+    if drift > MAX_SCALE_DRIFT or drift < 1 / MAX_SCALE_DRIFT:
+        return None
+    return (x1, y1, x2, y2)
+
+
+class FaceLocator:
+    """
+    Locates faces lazily, one analysis round at a time. A frame next to one whose
+    face is already known follows that face with a tracker, but only when the
+    samples are at most TRACK_MAX_GAP_SECONDS apart; every other frame, and every
+    frame where tracking fails, is detected in one batched SSD pass per round.
+    `batch_sizes` records the size of each SSD pass.
+    """
+
+    def __init__(self, frames, times=None):
+        self.frames = frames
+        # Timestamps that never advance (unknown to the container) rule out tracking
+        self.times = times if times and times[-1] > times[0] else None
+        self.boxes = {}  # frame index -> detected or tracked box (None: no face)
+        self.batch_sizes = []
+
+    def _neighbour(self, i):
+        """An adjacent sample with a known face that is close enough in time to track from."""
+        if self.times is None:
+            return None
+        for j in (i - 1, i + 1):
+            if self.boxes.get(j) is not None and abs(self.times[i] - self.times[j]) <= TRACK_MAX_GAP_SECONDS:
+                return j
+        return None
+
+    def _track(self, source, target):
+        box = self.boxes[source]
+        tracker = _start_tracker(self.frames[source], box)
+        return _update_tracker(tracker, self.frames[target], (box[2] - box[0]) * (box[3] - box[1]))
+
+    def locate(self, indices):
+        """Returns one face crop (or None) per frame index."""
+        to_detect = []
+        for i in indices:
+            source = self._neighbour(i)
+            box = self._track(source, i) if source is not None else None
+            if box is None:
+                to_detect.append(i)
+            else:
+                self.boxes[i] = box
+
+        if to_detect:
+            self.batch_sizes.append(len(to_detect))
+            for i, box in zip(to_detect, detect_closest_boxes([self.frames[i] for i in to_detect])):
+                self.boxes[i] = box
+
+        return [crop(self.frames[i], self.boxes[i]) for i in indices]
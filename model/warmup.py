@@ -0,0 +1,73 @@
+# Startup warm-up: load every model eagerly and push a dummy inference through it.
+import resource
+import threading
+import time
+import numpy as np
+from detector import get_net, detect_closest_boxes
+from emotion import get_emotion_model
+from pipeline import FIRST_ROUND, ROUND_SIZE
+
+# Per-model load/warm-up cost, reported by /readyz
+model_stats = {}
+_ready = threading.Event()
+
+
+def _rss_mb():
+    """Current resident memory of this process in MB."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS (KB on Linux) where /proc is not available
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(name, load, warm):
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    model = load()
+    loaded = time.perf_counter()
+    warm(model)
+    warmed = time.perf_counter()
+
+    model_stats[name] = {
+        "load_seconds": round(loaded - start, 3),
+        "warmup_seconds": round(warmed - loaded, 3),
+        "memory_mb": round(_rss_mb() - rss_before, 1),
+    }
+    return model_stats[name]
+
+
+def _warm_ssd(net):
+    blank = np.zeros((300, 300, 3), dtype=np.uint8)
+    detect_closest_boxes([blank] * FIRST_ROUND)
+
+
+def _warm_emotion(model):
+    # Build the graph for the batch sizes the pipeline actually uses
+    for batch_size in sorted({1, FIRST_ROUND, ROUND_SIZE}):
+        model.model(np.zeros((batch_size, 48, 48, 1), dtype=np.float32), training=False)
+
+
+def warm_up():
+    """Loads the SSD detector and the emotion model, runs a dummy inference on each and marks the worker ready."""
+    for name, load, warm in (
+        ("ssd_face_detector", get_net, _warm_ssd),
+        ("deepface_emotion", get_emotion_model, _warm_emotion),
+    ):
+        stats = _measure(name, load, warm)
+        print(f"Model '{name}' ready: loaded in {stats['load_seconds']}s, "
+              f"warmed in {stats['warmup_seconds']}s, +{stats['memory_mb']} MB")
+    _ready.set()
+
+
+def skip_warm_up():
+    """WARMUP_ON_START=0: models load on first use, so the worker takes traffic straight away."""
+    _ready.set()
+
+
+def is_ready():
+    return _ready.is_set()
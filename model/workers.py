@@ -0,0 +1,167 @@
+# Bounded inference worker pool: each process owns its own SSD detector and emotion model.
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+# 0 runs inference inline in the web process (one request at a time)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+# Requests allowed to wait for a free worker before new ones are turned away
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "4"))
+RETRY_AFTER_SECONDS = int(os.getenv("INFERENCE_RETRY_AFTER", "2"))
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+_executor = None
+# Inline mode runs videos one at a time on this thread: cv2.dnn nets and the
+# Keras model are not safe to share between request threads
+_inline_executor = ThreadPoolExecutor(max_workers=1)
+_warm_futures = []
+_restart_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, INFERENCE_WORKERS) + INFERENCE_QUEUE_SIZE)
+_queued = 0
+_queued_lock = threading.Lock()
+
+
+def _init_worker():
+    from warmup import warm_up
+    warm_up()
+
+
+def _worker_stats():
+    from warmup import model_stats
+    return os.getpid(), model_stats
+
+
+def _analyze_upload(source, deadline):
+    from pipeline import analyze_video
+    if isinstance(source, str):
+        # An upload that spilled to disk is read from its temp file, not copied over
+        with open(source, "rb") as stream:
+            return analyze_video(stream, deadline)
+    return analyze_video(io.BytesIO(source), deadline)
+
+
+def _new_executor():
+    # spawn, not fork: TensorFlow and OpenCV threads do not survive a fork
+    executor = ProcessPoolExecutor(
+        max_workers=INFERENCE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    _warm_futures[:] = [executor.submit(_worker_stats) for _ in range(INFERENCE_WORKERS)]
+    return executor
+
+
+def start_pool():
+    """
+    Spawns the inference processes and has each load and warm its models.
+    Does nothing in inline mode or inside a pool process itself.
+    """
+    global _executor
+    if INFERENCE_WORKERS <= 0 or _executor is not None or multiprocessing.parent_process() is not None:
+        return
+
+    _executor = _new_executor()
+
+
+def _restart_pool(broken):
+    """
+    Replaces `broken` with a fresh pool once one of its processes has died
+    (e.g. OOM-killed). Jobs it was running fail; new ones go to the new pool,
+    which reports not-ready until its processes have warmed up.
+    """
+    global _executor
+    with _restart_lock:
+        if _executor is not broken:
+            return
+        print("Inference pool is broken (a worker process died); starting a new one")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = _new_executor()
+
+
+def _is_broken(executor):
+    # Set by the executor itself when a process exits unexpectedly, even while idle
+    return getattr(executor, "_broken", False)
+
+
+def pool_ready():
+    if _executor is None:
+        from warmup import is_ready
+        return is_ready()
+    if _is_broken(_executor):
+        _restart_pool(_executor)
+        return False
+    return all(f.done() and f.exception() is None for f in _warm_futures)
+
+
+def pool_stats():
+    """Per-model load stats, keyed by worker pid in pool mode."""
+    if _executor is None:
+        from warmup import model_stats
+        return model_stats
+    return dict(f.result() for f in _warm_futures if f.done() and f.exception() is None)
+
+
+def queue_depth():
+    return _queued
+
+
+def acquire_slot():
+    """Reserves a place in the bounded queue, or raises PoolSaturated straight away."""
+    global _queued
+    if not _slots.acquire(blocking=False):
+        raise PoolSaturated("Server is busy analyzing other videos. Please retry shortly.")
+    with _queued_lock:
+        _queued += 1
+
+
+def release_slot():
+    global _queued
+    with _queued_lock:
+        _queued -= 1
+    _slots.release()
+
+
+@contextmanager
+def inference_slot():
+    acquire_slot()
+    try:
+        yield
+    finally:
+        release_slot()
+
+
+def submit_analysis(source, deadline=None):
+    """
+    Queues the video pipeline on a pool process (or the inline thread) and returns
+    a Future of its analysis dict. `source` is an upload's bytes or the path of its
+    temp file (see ingest.upload_source). A deadline of None starts the time
+    budget when the job starts running.
+    """
+    if _executor is None:
+        return _inline_executor.submit(_analyze_upload, source, deadline)
+    executor = _executor
+    try:
+        future = executor.submit(_analyze_upload, source, deadline)
+    except BrokenProcessPool:
+        _restart_pool(executor)
+        executor = _executor
+        future = executor.submit(_analyze_upload, source, deadline)
+
+    def restart_if_broken(done):
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            _restart_pool(executor)
+    future.add_done_callback(restart_if_broken)
+    return future
+
+
+def run_analysis(source, deadline):
+    """Runs the video pipeline in a pool process (or inline) and returns its analysis dict."""
+    return submit_analysis(source, deadline).result()
@@ -0,0 +1,155 @@
+"""Inference backends for the text emotion classifier, selected with TEXT_MODEL_BACKEND."""
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HUB_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
+# "torch" (transformers pipeline) or "onnx" (ONNX Runtime on an exported graph)
+TEXT_MODEL_BACKEND = os.getenv("TEXT_MODEL_BACKEND", "torch")
+# Local model directory; required for onnx, optional for torch (falls back to the hub)
+TEXT_MODEL_PATH = os.getenv("TEXT_MODEL_PATH", "")
+# Graph file inside TEXT_MODEL_PATH; export_onnx.py writes both of these
+ONNX_MODEL_FILE = "model_quantized.onnx" if os.getenv("TEXT_MODEL_QUANTIZED", "1") == "1" else "model.onnx"
+# 0 lets ONNX Runtime use every core
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+MAX_LENGTH = 512
+
+
+def pad_token_ids(windows, pad_id):
+    """Right-pads token id lists into input_ids/attention_mask arrays, as the tokenizer would."""
+    width = max(len(ids) for ids in windows)
+    input_ids = np.full((len(windows), width), pad_id, dtype=np.int64)
+    attention_mask = np.zeros((len(windows), width), dtype=np.int64)
+    for row, ids in enumerate(windows):
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+    return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+def rank_labels(labels, probs):
+    """One list of {label, score} per row of probabilities, highest first, like the pipeline."""
+    return [
+        sorted(({"label": label, "score": float(p)} for label, p in zip(labels, row)),
+               key=lambda pred: pred["score"], reverse=True)
+        for row in probs
+    ]
+
+
+class OnnxTextClassifier:
+    """
+    Drop-in for the transformers text-classification pipeline with top_k=None:
+    called with a list of texts, returns one list of {label, score} per text.
+    """
+
+    def __init__(self, model_dir, model_file=ONNX_MODEL_FILE, intra_op_threads=ONNX_INTRA_OP_THREADS):
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        config = AutoConfig.from_pretrained(model_dir, local_files_only=True)
+        self.labels = [config.id2label[i] for i in range(len(config.id2label))]
+
+        self.model_path = os.path.join(model_dir, model_file)
+        self.intra_op_threads = intra_op_threads
+        self._session = None
+        self._session_pid = None
+
+    def session(self):
+        """
+        The ONNX Runtime session of this process. It is created on first use:
+        a session's thread pool does not survive a fork, so a preloading
+        parent must not own one.
+        """
+        if self._session is None or self._session_pid != os.getpid():
+            import onnxruntime as ort
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.intra_op_threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self._session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+            self._input_names = {i.name for i in self._session.get_inputs()}
+            self._session_pid = os.getpid()
+        return self._session
+
+    def __call__(self, texts, batch_size=None):
+        if isinstance(texts, str):
+            texts = [texts]
+        batch_size = batch_size or len(texts)
+        results = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(self._run(texts[start:start + batch_size]))
+        return results
+
+    def classify_ids(self, windows, batch_size=None):
+        """Like calling the classifier, for inputs that are already token ids with special tokens."""
+        batch_size = batch_size or len(windows)
+        results = []
+        for start in range(0, len(windows), batch_size):
+            results.extend(self._score(pad_token_ids(windows[start:start + batch_size], self.tokenizer.pad_token_id)))
+        return results
+
+    def _run(self, texts):
+        return self._score(self.tokenizer(texts, padding=True, truncation=True, max_length=MAX_LENGTH,
+                                          return_tensors="np"))
+
+    def _score(self, encoded):
+        session = self.session()
+        feeds = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+        logits = session.run(None, feeds)[0]
+        # Same softmax the pipeline applies for single-label models
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return rank_labels(self.labels, exp / exp.sum(axis=1, keepdims=True))
+
+
+def load_torch_classifier(model_path, device):
+    from transformers import pipeline
+    # A directory path is read as is; only the hub name triggers a download
+    model = model_path or HUB_MODEL_NAME
+    return pipeline(
+        "text-classification",
+        model=model,
+        tokenizer=model,
+        device=0 if device == "cuda" else -1,
+        top_k=None,
+        max_length=MAX_LENGTH,
+        truncation=True,
+    )
+
+
+def classify_token_ids(classifier, windows, batch_size=None):
+    """
+    Scores inputs that are already token ids (special tokens included) with
+    either backend, so texts tokenized for windowing are not tokenized again.
+    Returns one list of {label, score} per input, like the pipeline.
+    """
+    if isinstance(classifier, OnnxTextClassifier):
+        return classifier.classify_ids(windows, batch_size)
+
+    import torch
+    model = classifier.model
+    labels = [model.config.id2label[i] for i in range(len(model.config.id2label))]
+    batch_size = batch_size or len(windows)
+    results = []
+    for start in range(0, len(windows), batch_size):
+        encoded = pad_token_ids(windows[start:start + batch_size], classifier.tokenizer.pad_token_id)
+        with torch.inference_mode():
+            logits = model(**{name: torch.from_numpy(value).to(model.device) for name, value in encoded.items()}).logits
+        results.extend(rank_labels(labels, torch.softmax(logits.float(), dim=-1).cpu().numpy()))
+    return results
+
+
+def load_classifier(backend=TEXT_MODEL_BACKEND, model_path=TEXT_MODEL_PATH, device="cpu"):
+    """Builds the classifier for `backend`. Raises ValueError on an unknown backend or missing path."""
+    if backend == "onnx":
+        if not model_path:
+            raise ValueError("TEXT_MODEL_PATH must point to an exported model for the onnx backend")
+        logger.info(f"Loading ONNX model: {os.path.join(model_path, ONNX_MODEL_FILE)} "
+                    f"(intra-op threads: {ONNX_INTRA_OP_THREADS or 'all'})")
+        return OnnxTextClassifier(model_path)
+    if backend == "torch":
+        logger.info(f"Loading model: {model_path or HUB_MODEL_NAME} on device: {device}")
+        return load_torch_classifier(model_path, device)
+    raise ValueError(f"Unknown TEXT_MODEL_BACKEND: {backend}")
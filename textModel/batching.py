@@ -0,0 +1,85 @@
+"""Dynamic micro-batching: concurrent single-item calls share one batched model call."""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Most texts classified in one forward pass
+TEXT_BATCH_MAX_SIZE = int(os.getenv("TEXT_BATCH_MAX_SIZE", "16"))
+# How long the first request of a batch waits for others to join it
+TEXT_BATCH_WAIT_MS = float(os.getenv("TEXT_BATCH_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many request threads and hands them to
+    `batch_fn` in groups of up to `max_batch_size`. A batch is closed when it is
+    full or `max_wait_ms` after its first item arrived. `batch_fn` takes a list
+    of items and returns a list of results in the same order.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=TEXT_BATCH_MAX_SIZE, max_wait_ms=TEXT_BATCH_WAIT_MS):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Started on first use so a preloaded parent process does not own the thread
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="text-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, item):
+        """Queues one item and returns a Future of its result."""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((item, future))
+        return future
+
+    def pending(self):
+        """Items queued and not yet picked up by a batch."""
+        return self._queue.qsize()
+
+    def __call__(self, item):
+        """Runs one item through the next batch and blocks for its result."""
+        return self.submit(item).result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        closes_at = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = closes_at - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # Retry one by one so a single bad item only fails its own request
+                logger.warning(f"Batch of {len(items)} failed, retrying items individually: {e}")
+                for item, future in batch:
+                    try:
+                        future.set_result(self.batch_fn([item])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,63 @@
+# Compares the ONNX backends (fp32 and int8) with the PyTorch pipeline:
+# top-label agreement, score differences and latency per batch size.
+#   python check_onnx_parity.py models/emotion-onnx [torch_source]
+import statistics
+import sys
+import time
+
+from backends import HUB_MODEL_NAME, OnnxTextClassifier, load_torch_classifier
+from test_emotions import TEST_CASES, Colors
+
+BATCH_SIZES = (1, 16)
+REPEATS = 20
+# int8 weights shift scores slightly; the top label should not move
+MAX_SCORE_DIFF = 0.05
+
+
+def as_dict(predictions):
+    return {pred["label"]: pred["score"] for pred in predictions}
+
+
+def median_ms(classifier, texts, batch_size):
+    batch = (texts * batch_size)[:batch_size]
+    classifier(batch, batch_size=batch_size)  # warm-up
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        classifier(batch, batch_size=batch_size)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(onnx_dir, torch_source=HUB_MODEL_NAME):
+    texts = [" . ".join(case["responses"]) for case in TEST_CASES]
+    reference = load_torch_classifier(torch_source if torch_source != HUB_MODEL_NAME else "", "cpu")
+    backends = {
+        "onnx fp32": OnnxTextClassifier(onnx_dir, "model.onnx"),
+        "onnx int8": OnnxTextClassifier(onnx_dir, "model_quantized.onnx"),
+    }
+
+    expected = [as_dict(preds) for preds in reference(texts, batch_size=len(texts))]
+    passed = True
+    print(f"{Colors.BLUE}--- Parity against PyTorch on {len(texts)} texts ---{Colors.RESET}")
+    for name, classifier in backends.items():
+        got = [as_dict(preds) for preds in classifier(texts)]
+        agree = sum(max(e, key=e.get) == max(g, key=g.get) for e, g in zip(expected, got))
+        max_diff = max(abs(e[label] - g[label]) for e, g in zip(expected, got) for label in e)
+        ok = agree == len(texts) and max_diff <= MAX_SCORE_DIFF
+        passed = passed and ok
+        color = Colors.GREEN if ok else Colors.RED
+        print(f"{name}: {color}{agree}/{len(texts)} top labels match, max score diff {max_diff:.4f}{Colors.RESET}")
+
+    print(f"\n{Colors.BLUE}--- Median latency over {REPEATS} runs (ms) ---{Colors.RESET}")
+    print(f"{'backend':<12}" + "".join(f"{f'batch {n}':>12}" for n in BATCH_SIZES))
+    for name, classifier in {"torch": reference, **backends}.items():
+        print(f"{name:<12}" + "".join(f"{median_ms(classifier, texts, n):>12.1f}" for n in BATCH_SIZES))
+    return passed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python check_onnx_parity.py <onnx_dir> [torch_source]")
+        sys.exit(1)
+    sys.exit(0 if run(*sys.argv[1:3]) else 1)
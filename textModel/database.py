@@ -0,0 +1,101 @@
+"""Lazy, retrying MongoDB connection for the text service."""
+import logging
+import os
+import threading
+import time
+
+import certifi
+from pymongo import MongoClient
+
+from song_queries import ensure_indexes, SongSampler
+
+logger = logging.getLogger(__name__)
+
+# No default: credentials come from the environment, e.g. mongodb://localhost:27017
+MONGO_URI = os.getenv("MONGO_URI", "")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "moodify_db")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# After a failed connect, requests fail fast for this long before the next attempt
+MONGO_RETRY_SECONDS = float(os.getenv("MONGO_RETRY_SECONDS", "10"))
+
+
+class DatabaseUnavailable(Exception):
+    pass
+
+
+class SongDatabase:
+    """
+    Connects on first use instead of at import, once per process (a client
+    created before a fork is not reused by the child). A failed connect is
+    retried on a later request after MONGO_RETRY_SECONDS; once connected,
+    pymongo rides out short outages itself.
+    """
+
+    def __init__(self, uri=MONGO_URI, db_name=MONGO_DB_NAME):
+        self.uri = uri
+        self.db_name = db_name
+        self.client = None
+        self.songs_collection = None
+        self.song_sampler = None
+        self.last_error = None
+        self._pid = None
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        logger.info("Attempting to connect to MongoDB...")
+        tls_options = {}
+        # Any TLS option switches TLS on, so only pass certifi's CA bundle to
+        # URIs that already use it (Atlas SRV records default to TLS).
+        if self.uri.startswith("mongodb+srv://") or "tls=true" in self.uri.lower():
+            tls_options["tlsCAFile"] = certifi.where()
+        client = MongoClient(
+            self.uri,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            **tls_options,
+        )
+        # The ping command is cheap and does not require auth.
+        client.admin.command('ping')
+        songs_collection = client[self.db_name]["songs_by_emotion"]
+        ensure_indexes(songs_collection)
+        logger.info(f"Successfully connected to MongoDB. Using database: '{self.db_name}' "
+                    f"and collection: '{songs_collection.name}'")
+        return client, songs_collection
+
+    def connect(self):
+        """Returns the songs collection, connecting first if this process has no client yet."""
+        if self.songs_collection is not None and self._pid == os.getpid():
+            return self.songs_collection
+        with self._lock:
+            if self.songs_collection is not None and self._pid == os.getpid():
+                return self.songs_collection
+            if not self.uri:
+                self.last_error = "MONGO_URI is not set"
+                raise DatabaseUnavailable("Database unavailable: MONGO_URI is not set")
+            if time.monotonic() < self._retry_at:
+                raise DatabaseUnavailable(f"Database unavailable: {self.last_error}")
+            try:
+                self.client, self.songs_collection = self._connect()
+            except Exception as e:
+                self.last_error = str(e)
+                self._retry_at = time.monotonic() + MONGO_RETRY_SECONDS
+                logger.error(f"MongoDB connection failed, retrying in {MONGO_RETRY_SECONDS:g}s. Error: {e}")
+                raise DatabaseUnavailable(f"Database unavailable: {e}") from e
+            self.song_sampler = SongSampler(self.songs_collection)
+            self._pid = os.getpid()
+            self.last_error = None
+            return self.songs_collection
+
+    def sampler(self):
+        self.connect()
+        return self.song_sampler
+
+    def ping(self):
+        """Returns the number of songs, raising if the database cannot be reached."""
+        songs_collection = self.connect()
+        self.client.admin.command('ping')
+        return songs_collection.count_documents({})
@@ -0,0 +1,62 @@
+# Run this script once to export the emotion model for TEXT_MODEL_BACKEND=onnx:
+#   python export_onnx.py models/emotion-onnx [source]
+# `source` defaults to the hub model; pass a local directory to export offline.
+# Writes model.onnx, an int8 model_quantized.onnx, the tokenizer and config.
+import inspect
+import os
+import sys
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from backends import HUB_MODEL_NAME
+
+
+def export(out_dir, source=HUB_MODEL_NAME):
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = AutoModelForSequenceClassification.from_pretrained(source)
+    model.eval()
+
+    sample = tokenizer(["an example sentence", "a second, somewhat longer example sentence"],
+                       padding=True, return_tensors="pt")
+    onnx_path = os.path.join(out_dir, "model.onnx")
+    # Newer torch exports through dynamo by default; older releases have no such
+    # argument and only the TorchScript exporter.
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False
+    print(f"Exporting {source} to {onnx_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            onnx_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+            **export_kwargs,
+        )
+
+    quantized_path = os.path.join(out_dir, "model_quantized.onnx")
+    print(f"Quantizing weights to int8: {quantized_path}...")
+    quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+
+    # The backend loads these with local_files_only, so nothing is fetched at startup
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+    print("✓ Export finished. Start the API with:")
+    print(f"  TEXT_MODEL_BACKEND=onnx TEXT_MODEL_PATH={out_dir} python app.py")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python export_onnx.py <out_dir> [source]")
+        sys.exit(1)
+    export(*sys.argv[1:3])
@@ -0,0 +1,23 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5001")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Threads let the micro-batcher group concurrent requests inside one worker
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# TEXT_PRELOAD_MODEL=1: load the model once in the master and fork the workers
+# from it, so they share its weights copy-on-write. Nothing else is started
+# before the fork: the Mongo client and the batching thread are created lazily
+# in each worker.
+preload_app = os.getenv("TEXT_PRELOAD_MODEL", "0") == "1"
+
+
+def when_ready(server):
+    if preload_app:
+        # Keep the preloaded objects out of the collector so it does not touch
+        # (and un-share) their pages in every worker
+        gc.freeze()
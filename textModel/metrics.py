@@ -0,0 +1,71 @@
+"""
+Prometheus metrics for the text service, plus optional Server-Timing headers.
+The face service (model/) keeps its own copy of the request hook: the two are
+built and deployed separately and share no code.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context
+from prometheus_client import Histogram, Gauge
+
+# "1" adds a Server-Timing header with the stage durations of each response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+request_seconds = Histogram(
+    "moodify_text_request_seconds", "HTTP request latency", ["endpoint", "method", "status"], buckets=STAGE_BUCKETS
+)
+stage_seconds = Histogram(
+    "moodify_text_stage_seconds", "Time spent in each stage of a prediction", ["stage"], buckets=STAGE_BUCKETS
+)
+batch_size = Histogram(
+    "moodify_text_model_batch_size", "Texts per model forward pass", ["path"], buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+windows_per_text = Histogram(
+    "moodify_text_windows_per_text", "Token windows a text was split into", buckets=(1, 2, 3, 4, 6, 8)
+)
+batcher_queue_depth = Gauge("moodify_text_batcher_queue_depth", "Texts waiting for the micro-batcher")
+
+
+def watch_prediction_cache(cache):
+    """Publishes the cache's own counters, read at scrape time so lookups do no extra work."""
+    for field in ("hits", "misses", "hit_rate", "entries"):
+        Gauge(f"moodify_text_prediction_cache_{field}", f"Prediction cache {field.replace('_', ' ')}").set_function(
+            lambda field=field: cache.stats()[field])
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stage_seconds.labels(stage).observe(seconds)
+        # Stages timed on the batcher thread have no request to report them to
+        if SERVER_TIMING and has_request_context():
+            g.setdefault("server_timing", []).append((stage, seconds))
+
+
+def init_app(app):
+    """Observes request_seconds for every request and adds the Server-Timing header."""
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        start = g.pop("request_start", None)
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        request_seconds.labels(endpoint, request.method, str(response.status_code)).observe(total)
+        if SERVER_TIMING:
+            entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in g.get("server_timing", [])]
+            response.headers["Server-Timing"] = ", ".join(entries + [f"total;dur={total * 1000:.1f}"])
+        return response
@@ -0,0 +1,78 @@
+"""Bounded LRU+TTL cache of mapped emotion predictions, keyed by normalized input text."""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Set to 0 to classify every request afresh
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "1") == "1"
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_SECONDS = int(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "86400"))
+
+
+def normalize_text(text):
+    """
+    Collapses runs of whitespace. Case is kept: the classifier is case-sensitive,
+    so "ANGRY" and "angry" score differently. Callers classify the normalized
+    text too, so a cached answer is always the one the model would give.
+    """
+    return " ".join(text.split())
+
+
+def text_key(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """Thread-safe LRU of up to `max_entries` predictions, each kept for `ttl` seconds."""
+
+    def __init__(self, max_entries=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL_SECONDS,
+                 enabled=PREDICTION_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled and max_entries > 0
+        self._entries = OrderedDict()  # key -> (expires, predictions)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text):
+        if not self.enabled:
+            return None
+        key = text_key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, text, predictions):
+        if not self.enabled or predictions is None:
+            return
+        key = text_key(text)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, predictions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
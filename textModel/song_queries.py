@@ -0,0 +1,74 @@
+"""MongoDB queries on the songs_by_emotion collection, kept free of model imports."""
+import logging
+import os
+import random
+import threading
+import time
+
+from pymongo import ASCENDING
+
+logger = logging.getLogger(__name__)
+
+# How long a per-emotion pool of song ids is reused before it is reloaded
+SONG_POOL_TTL_SECONDS = int(os.getenv("SONG_POOL_TTL_SECONDS", "300"))
+
+# Per-emotion lookups filter on emotion and page/sort on _id
+SONG_INDEXES = [
+    [("emotion", ASCENDING), ("_id", ASCENDING)],
+]
+
+
+def ensure_indexes(songs_collection):
+    """Creates the indexes the song queries rely on. Logs a warning instead of failing startup."""
+    for keys in SONG_INDEXES:
+        try:
+            songs_collection.create_index(keys)
+        except Exception as e:
+            logger.warning(f"Could not create index {keys} on '{songs_collection.name}'; "
+                           f"song queries will fall back to collection scans. Error: {e}")
+
+
+def count_songs_by_emotion(songs_collection):
+    """Returns {emotion: song count} from a single grouped aggregation."""
+    pipeline = [
+        {"$group": {"_id": "$emotion", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return {row["_id"]: row["count"] for row in songs_collection.aggregate(pipeline) if row["_id"] is not None}
+
+
+class SongSampler:
+    """
+    Draws uniformly random songs per emotion. The _ids of each emotion are
+    loaded once from the (emotion, _id) index and kept for `ttl` seconds, so a
+    draw of k songs is a random.sample over that pool plus one $in lookup.
+    """
+
+    def __init__(self, songs_collection, ttl=SONG_POOL_TTL_SECONDS):
+        self.songs_collection = songs_collection
+        self.ttl = ttl
+        self._pools = {}  # emotion -> (expires, [ids])
+        self._lock = threading.Lock()
+
+    def _pool(self, emotion):
+        with self._lock:
+            entry = self._pools.get(emotion)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+        # Covered by the index: only _ids come back from the server
+        ids = [doc["_id"] for doc in self.songs_collection.find({"emotion": emotion}, {"_id": 1})]
+        with self._lock:
+            self._pools[emotion] = (time.monotonic() + self.ttl, ids)
+        return ids
+
+    def sample(self, emotion, k):
+        """Returns up to k distinct random songs for `emotion`, without their _id."""
+        ids = self._pool(emotion)
+        chosen = random.sample(ids, max(0, min(k, len(ids))))
+        if not chosen:
+            return []
+        songs = {song["_id"]: song for song in self.songs_collection.find({"_id": {"$in": chosen}})}
+        # Keep the random draw order; ids deleted since the pool was loaded are skipped
+        return [{field: value for field, value in songs[_id].items() if field != "_id"}
+                for _id in chosen if _id in songs]
+
@@ -0,0 +1,100 @@
+import logging
+
+# Checks the song queries against an in-process MongoDB stand-in (mongomock),
+# counting how many database round trips each one makes.
+# Run with: pip install -r requirements-dev.txt && python test_song_queries.py
+
+# Commands that each cost one round trip to the server
+ROUND_TRIP_METHODS = ("find", "find_one", "aggregate", "distinct", "count_documents", "create_index")
+
+
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    RESET = '\033[0m'
+
+
+class CountingCollection:
+    """Wraps a collection and counts the calls that would reach the database."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in ROUND_TRIP_METHODS:
+            def counted(*args, **kwargs):
+                self.round_trips += 1
+                return attr(*args, **kwargs)
+            return counted
+        return attr
+
+
+def make_collection():
+    import mongomock
+    songs = mongomock.MongoClient()["moodify_db"]["songs_by_emotion"]
+    emotions = ["happy"] * 5 + ["sad"] * 3 + ["angry"] * 2 + ["neutral", "surprised"]
+    songs.insert_many([{"emotion": emo, "song_title": f"Song {i}"} for i, emo in enumerate(emotions)])
+    songs.insert_one({"song_title": "Untagged"})
+    return CountingCollection(songs)
+
+
+def check(name, passed, detail):
+    status = f"{Colors.GREEN}✔ SUCCESS{Colors.RESET}" if passed else f"{Colors.RED}✖ FAILURE{Colors.RESET}"
+    print(f"{name}: {status}  {detail}")
+    return passed
+
+
+def run_tests():
+    from song_queries import ensure_indexes, count_songs_by_emotion, SongSampler
+
+    print(f"{Colors.BLUE}--- Song query round-trip checks ---{Colors.RESET}\n")
+    results = []
+
+    songs = make_collection()
+    ensure_indexes(songs)
+    index_keys = [list(index["key"]) for index in songs.list_indexes()]
+    results.append(check("Emotion index created", ["emotion", "_id"] in index_keys, f"indexes: {index_keys}"))
+
+    songs.round_trips = 0
+    counts = count_songs_by_emotion(songs)
+    expected = {"happy": 5, "sad": 3, "angry": 2, "neutral": 1, "surprised": 1}
+    results.append(check("Counts match", counts == expected, f"got {counts}"))
+    results.append(check("Counts use one round trip", songs.round_trips == 1, f"round trips: {songs.round_trips}"))
+
+    sampler = SongSampler(songs)
+    songs.round_trips = 0
+    draws = [sampler.sample("happy", 3) for _ in range(200)]
+    results.append(check("Sample size", all(len(d) == 3 for d in draws), f"sizes: {sorted({len(d) for d in draws})}"))
+    seen = {song["song_title"] for d in draws for song in d}
+    results.append(check("Samples cover every song", len(seen) == 5, f"distinct songs drawn: {len(seen)}"))
+    # One id load for the pool, then a single $in lookup per draw
+    results.append(check("Sampling round trips", songs.round_trips == 1 + len(draws),
+                         f"round trips: {songs.round_trips}"))
+    results.append(check("Sample capped at pool size", len(sampler.sample("sad", 20)) == 3, ""))
+    results.append(check("Unknown emotion", sampler.sample("Happy", 5) == [], ""))
+
+    # Index bootstrap must only warn when the server refuses
+    class Refusing:
+        name = "songs_by_emotion"
+
+        def create_index(self, keys):
+            raise RuntimeError("not authorized")
+
+    logging.disable(logging.WARNING)
+    try:
+        ensure_indexes(Refusing())
+        results.append(check("Index failure does not raise", True, ""))
+    except Exception as e:
+        results.append(check("Index failure does not raise", False, repr(e)))
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(f"\nFinal Result: {sum(results)}/{len(results)} checks passed")
+    return all(results)
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if run_tests() else 1)
@@ -0,0 +1,68 @@
+"""Splits long texts into overlapping token windows and merges the window scores."""
+import os
+from functools import lru_cache
+
+# 0 restores the old behaviour: cut input at 400 words and let the model truncate
+TEXT_LONG_MODE = os.getenv("TEXT_LONG_MODE", "1") == "1"
+# Tokens per window, leaving room for the two special tokens of a 512-token model
+TEXT_WINDOW_TOKENS = int(os.getenv("TEXT_WINDOW_TOKENS", "510"))
+TEXT_WINDOW_OVERLAP = int(os.getenv("TEXT_WINDOW_OVERLAP", "64"))
+# Upper bound on forward-pass inputs per text; longer texts are sampled evenly
+TEXT_MAX_WINDOWS = int(os.getenv("TEXT_MAX_WINDOWS", "8"))
+# Characters tokenized per text; enough for TEXT_MAX_WINDOWS full windows at a
+# generous ~8 characters per token, so a huge payload is cut before tokenizing
+TEXT_MAX_CHARS = int(os.getenv("TEXT_MAX_CHARS", str(TEXT_MAX_WINDOWS * TEXT_WINDOW_TOKENS * 8)))
+
+
+def window_starts(num_tokens, window_tokens, overlap, max_windows):
+    if num_tokens <= window_tokens:
+        return [0]
+    step = max(1, window_tokens - overlap)
+    # The last window is aligned to the end so the ending is never dropped
+    starts = list(range(0, num_tokens - window_tokens, step)) + [num_tokens - window_tokens]
+    if len(starts) > max_windows:
+        if max_windows <= 1:
+            return starts[:1]
+        last = len(starts) - 1
+        starts = [starts[round(i * last / (max_windows - 1))] for i in range(max_windows)]
+    return starts
+
+
+@lru_cache(maxsize=4)
+def special_tokens(tokenizer):
+    """The (prefix, suffix) token ids the tokenizer wraps every input in, e.g. <s> and </s>."""
+    plain = tokenizer("hello", add_special_tokens=False)["input_ids"]
+    wrapped = tokenizer("hello")["input_ids"]
+    for start in range(len(wrapped) - len(plain) + 1):
+        if wrapped[start:start + len(plain)] == plain:
+            return wrapped[:start], wrapped[start + len(plain):]
+    return [], []
+
+
+def split_windows(tokenizer, text, window_tokens=TEXT_WINDOW_TOKENS, overlap=TEXT_WINDOW_OVERLAP,
+                  max_windows=TEXT_MAX_WINDOWS, max_chars=TEXT_MAX_CHARS):
+    """
+    Tokenizes the first `max_chars` characters of `text` once and returns
+    [(input_ids, token_count)] for windows of at most `window_tokens` tokens
+    overlapping by `overlap`. Each window already carries the model's special
+    tokens, so it goes to the classifier as is and can never exceed the model's
+    input length.
+    """
+    ids = tokenizer(text[:max_chars], add_special_tokens=False, verbose=False)["input_ids"]
+    prefix, suffix = special_tokens(tokenizer)
+    windows = []
+    for start in window_starts(len(ids), window_tokens, overlap, max_windows):
+        window = ids[start:start + window_tokens]
+        windows.append((prefix + window + suffix, max(1, len(window))))
+    return windows
+
+
+def combine_window_scores(window_predictions, weights):
+    """Length-weighted average of per-window label scores, sorted like the pipeline output."""
+    total = float(sum(weights))
+    scores = {}
+    for predictions, weight in zip(window_predictions, weights):
+        for pred in predictions:
+            scores[pred["label"]] = scores.get(pred["label"], 0.0) + pred["score"] * weight / total
+    return sorted(({"label": label, "score": score} for label, score in scores.items()),
+                  key=lambda pred: pred["score"], reverse=True)